@@ -0,0 +1,139 @@
+"""esquema inicial
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 05:28:01.673492
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('categorias',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_categorias_id'), 'categorias', ['id'], unique=False)
+    op.create_table('usuarios',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nombre', sa.String(length=100), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('contrasena', sa.String(length=255), nullable=False),
+    sa.Column('rol', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_usuarios_email'), 'usuarios', ['email'], unique=True)
+    op.create_index(op.f('ix_usuarios_id'), 'usuarios', ['id'], unique=False)
+    op.create_table('alquileres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cuota', sa.Integer(), nullable=False),
+    sa.Column('vencimiento', sa.Date(), nullable=False),
+    sa.Column('inquilino', sa.String(length=255), nullable=False),
+    sa.Column('deuda', sa.Float(), nullable=False),
+    sa.Column('pagado', sa.Float(), nullable=False),
+    sa.Column('propiedad', sa.Text(), nullable=True),
+    sa.Column('recibo', sa.String(length=100), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_alquileres_id'), 'alquileres', ['id'], unique=False)
+    op.create_table('otros_creditos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cuotas', sa.Integer(), nullable=False),
+    sa.Column('vencimiento', sa.Date(), nullable=False),
+    sa.Column('detalle', sa.Text(), nullable=True),
+    sa.Column('deuda', sa.Float(), nullable=False),
+    sa.Column('pago', sa.Float(), nullable=False),
+    sa.Column('medio_de_pago', sa.String(length=100), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_otros_creditos_id'), 'otros_creditos', ['id'], unique=False)
+    op.create_table('servicios',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vencimiento', sa.Date(), nullable=False),
+    sa.Column('servicio', sa.String(length=100), nullable=False),
+    sa.Column('detalle', sa.Text(), nullable=True),
+    sa.Column('cuenta', sa.String(length=100), nullable=True),
+    sa.Column('monto_ars', sa.Float(), nullable=True),
+    sa.Column('monto_usd', sa.Float(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_servicios_id'), 'servicios', ['id'], unique=False)
+    op.create_table('tarjetas_credito',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cuotas', sa.Integer(), nullable=False),
+    sa.Column('vencimiento', sa.Date(), nullable=False),
+    sa.Column('detalle', sa.Text(), nullable=True),
+    sa.Column('deuda', sa.Float(), nullable=False),
+    sa.Column('pago', sa.Float(), nullable=False),
+    sa.Column('medio_de_pago', sa.String(length=100), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tarjetas_credito_id'), 'tarjetas_credito', ['id'], unique=False)
+    op.create_table('transacciones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('categoria_id', sa.Integer(), nullable=False),
+    sa.Column('detalle', sa.Text(), nullable=True),
+    sa.Column('monto', sa.Float(), nullable=False),
+    sa.Column('medio_de_pago', sa.String(length=100), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['categoria_id'], ['categorias.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transacciones_id'), 'transacciones', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transacciones_id'), table_name='transacciones')
+    op.drop_table('transacciones')
+    op.drop_index(op.f('ix_tarjetas_credito_id'), table_name='tarjetas_credito')
+    op.drop_table('tarjetas_credito')
+    op.drop_index(op.f('ix_servicios_id'), table_name='servicios')
+    op.drop_table('servicios')
+    op.drop_index(op.f('ix_otros_creditos_id'), table_name='otros_creditos')
+    op.drop_table('otros_creditos')
+    op.drop_index(op.f('ix_alquileres_id'), table_name='alquileres')
+    op.drop_table('alquileres')
+    op.drop_index(op.f('ix_usuarios_id'), table_name='usuarios')
+    op.drop_index(op.f('ix_usuarios_email'), table_name='usuarios')
+    op.drop_table('usuarios')
+    op.drop_index(op.f('ix_categorias_id'), table_name='categorias')
+    op.drop_table('categorias')
@@ -0,0 +1,46 @@
+"""indices de listados por usuario
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 05:28:03.200529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_alquileres_usuario_vencimiento_impagos', 'alquileres', ['usuario_id', 'vencimiento'], unique=False, postgresql_where=sa.text('deuda > pagado'), sqlite_where=sa.text('deuda > pagado'))
+    op.create_index('ix_alquileres_usuario_vencimiento_inquilino', 'alquileres', ['usuario_id', 'vencimiento', 'inquilino'], unique=False)
+    op.create_index('ix_otros_creditos_usuario_vencimiento', 'otros_creditos', ['usuario_id', 'vencimiento'], unique=False)
+    op.create_index('ix_otros_creditos_usuario_vencimiento_impagas', 'otros_creditos', ['usuario_id', 'vencimiento'], unique=False, postgresql_where=sa.text('deuda > pago'), sqlite_where=sa.text('deuda > pago'))
+    op.create_index('ix_servicios_usuario_vencimiento_servicio', 'servicios', ['usuario_id', 'vencimiento', 'servicio'], unique=False)
+    op.create_index('ix_tarjetas_credito_usuario_vencimiento', 'tarjetas_credito', ['usuario_id', 'vencimiento'], unique=False)
+    op.create_index('ix_tarjetas_credito_usuario_vencimiento_impagas', 'tarjetas_credito', ['usuario_id', 'vencimiento'], unique=False, postgresql_where=sa.text('deuda > pago'), sqlite_where=sa.text('deuda > pago'))
+    op.create_index('ix_transacciones_categoria_id', 'transacciones', ['categoria_id'], unique=False)
+    op.create_index('ix_transacciones_usuario_categoria_fecha_id', 'transacciones', ['usuario_id', 'categoria_id', sa.literal_column('fecha DESC'), sa.literal_column('id DESC')], unique=False)
+    op.create_index('ix_transacciones_usuario_fecha_id', 'transacciones', ['usuario_id', sa.literal_column('fecha DESC'), sa.literal_column('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transacciones_usuario_fecha_id', table_name='transacciones')
+    op.drop_index('ix_transacciones_usuario_categoria_fecha_id', table_name='transacciones')
+    op.drop_index('ix_transacciones_categoria_id', table_name='transacciones')
+    op.drop_index('ix_tarjetas_credito_usuario_vencimiento_impagas', table_name='tarjetas_credito', postgresql_where=sa.text('deuda > pago'), sqlite_where=sa.text('deuda > pago'))
+    op.drop_index('ix_tarjetas_credito_usuario_vencimiento', table_name='tarjetas_credito')
+    op.drop_index('ix_servicios_usuario_vencimiento_servicio', table_name='servicios')
+    op.drop_index('ix_otros_creditos_usuario_vencimiento_impagas', table_name='otros_creditos', postgresql_where=sa.text('deuda > pago'), sqlite_where=sa.text('deuda > pago'))
+    op.drop_index('ix_otros_creditos_usuario_vencimiento', table_name='otros_creditos')
+    op.drop_index('ix_alquileres_usuario_vencimiento_inquilino', table_name='alquileres')
+    op.drop_index('ix_alquileres_usuario_vencimiento_impagos', table_name='alquileres', postgresql_where=sa.text('deuda > pagado'), sqlite_where=sa.text('deuda > pagado'))
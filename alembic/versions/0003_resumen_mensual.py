@@ -0,0 +1,48 @@
+"""resumen mensual
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 05:29:22.759489
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resumen_mensual',
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('mes', sa.Date(), nullable=False),
+    sa.Column('categoria_id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['categoria_id'], ['categorias.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('usuario_id', 'mes', 'categoria_id', 'tipo')
+    )
+    # Carga inicial desde las transacciones existentes. En otros motores
+    # usar: python -m app.database.rebuild_resumen
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("""
+            INSERT INTO resumen_mensual (usuario_id, mes, categoria_id, tipo, total, cantidad)
+            SELECT usuario_id, date_trunc('month', fecha)::date, categoria_id, tipo, SUM(monto), COUNT(*)
+            FROM transacciones
+            GROUP BY usuario_id, date_trunc('month', fecha)::date, categoria_id, tipo
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('resumen_mensual')
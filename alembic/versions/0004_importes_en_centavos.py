@@ -0,0 +1,66 @@
+"""importes en centavos
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 05:45:10.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columnas de importes: pasan de FLOAT a BIGINT de centavos
+COLUMNAS = [
+    ('transacciones', 'monto', False),
+    ('tarjetas_credito', 'deuda', False),
+    ('tarjetas_credito', 'pago', False),
+    ('otros_creditos', 'deuda', False),
+    ('otros_creditos', 'pago', False),
+    ('alquileres', 'deuda', False),
+    ('alquileres', 'pagado', False),
+    ('servicios', 'monto_ars', True),
+    ('servicios', 'monto_usd', True),
+    ('resumen_mensual', 'total', False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite no tiene USING y recrea la tabla al cambiar el tipo: se escalan
+    # los valores antes, mientras la columna todavia admite decimales
+    if op.get_bind().dialect.name != 'postgresql':
+        for tabla, columna, _ in COLUMNAS:
+            op.execute(f'UPDATE {tabla} SET {columna} = ROUND({columna} * 100)')
+    for tabla, columna, nullable in COLUMNAS:
+        with op.batch_alter_table(tabla) as batch_op:
+            batch_op.alter_column(
+                columna,
+                existing_type=sa.Float(),
+                type_=sa.BigInteger(),
+                existing_nullable=nullable,
+                postgresql_using=f'round({columna}::numeric * 100)::bigint',
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabla, columna, nullable in COLUMNAS:
+        with op.batch_alter_table(tabla) as batch_op:
+            batch_op.alter_column(
+                columna,
+                existing_type=sa.BigInteger(),
+                type_=sa.Float(),
+                existing_nullable=nullable,
+                postgresql_using=f'{columna}::double precision / 100',
+            )
+    if op.get_bind().dialect.name != 'postgresql':
+        for tabla, columna, _ in COLUMNAS:
+            op.execute(f'UPDATE {tabla} SET {columna} = {columna} / 100.0')
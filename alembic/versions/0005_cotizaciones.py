@@ -0,0 +1,34 @@
+"""cotizaciones
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 05:45:52.783150
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('cotizaciones',
+    sa.Column('serie', sa.String(length=20), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('valor', sa.Numeric(precision=14, scale=4), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('serie', 'fecha')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cotizaciones')
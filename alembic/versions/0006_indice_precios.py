@@ -0,0 +1,33 @@
+"""indice precios
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 05:47:35.308278
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('indice_precios',
+    sa.Column('mes', sa.Date(), nullable=False),
+    sa.Column('valor', sa.Numeric(precision=14, scale=4), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('mes')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('indice_precios')
@@ -0,0 +1,58 @@
+"""contratos alquiler
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 05:50:14.076854
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('contratos_alquiler',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('propiedad', sa.Text(), nullable=False),
+    sa.Column('inquilino', sa.String(length=255), nullable=False),
+    sa.Column('inicio', sa.Date(), nullable=False),
+    sa.Column('meses', sa.Integer(), nullable=False),
+    sa.Column('monto_inicial', sa.BigInteger(), nullable=False),
+    sa.Column('indice', sa.String(length=10), nullable=False),
+    sa.Column('periodo_ajuste', sa.Integer(), nullable=False),
+    sa.Column('porcentaje_ajuste', sa.Numeric(precision=7, scale=4), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_contratos_alquiler_id'), 'contratos_alquiler', ['id'], unique=False)
+    op.create_index('ix_contratos_alquiler_usuario_propiedad', 'contratos_alquiler', ['usuario_id', 'propiedad'], unique=False)
+    # batch: SQLite no puede agregar una FK con ALTER TABLE
+    with op.batch_alter_table('alquileres') as batch_op:
+        batch_op.add_column(sa.Column('contrato_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_alquileres_contrato_id'), ['contrato_id'], unique=False)
+        batch_op.create_foreign_key(
+            'fk_alquileres_contrato_id', 'contratos_alquiler', ['contrato_id'], ['id'], ondelete='SET NULL'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('alquileres') as batch_op:
+        batch_op.drop_constraint('fk_alquileres_contrato_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_alquileres_contrato_id'))
+        batch_op.drop_column('contrato_id')
+    op.drop_index('ix_contratos_alquiler_usuario_propiedad', table_name='contratos_alquiler')
+    op.drop_index(op.f('ix_contratos_alquiler_id'), table_name='contratos_alquiler')
+    op.drop_table('contratos_alquiler')
@@ -0,0 +1,38 @@
+"""claves idempotencia
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 05:52:22.700453
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('claves_idempotencia',
+    sa.Column('clave', sa.String(length=64), nullable=False),
+    sa.Column('huella', sa.String(length=64), nullable=False),
+    sa.Column('estado', sa.Integer(), nullable=True),
+    sa.Column('encabezados', sa.Text(), nullable=True),
+    sa.Column('cuerpo', sa.LargeBinary(), nullable=True),
+    sa.Column('expira_en', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('clave')
+    )
+    op.create_index(op.f('ix_claves_idempotencia_expira_en'), 'claves_idempotencia', ['expira_en'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_claves_idempotencia_expira_en'), table_name='claves_idempotencia')
+    op.drop_table('claves_idempotencia')
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import usuarios, categorias, transacciones, tarjetas_credito, otros_creditos, alquileres, servicios
+from app.api.endpoints import usuarios, categorias, transacciones, tarjetas_credito, otros_creditos, alquileres, servicios, vencimientos, proyeccion, dashboard
 
 api_router = APIRouter()
 
@@ -10,4 +10,7 @@ api_router.include_router(transacciones.router, prefix="/transacciones", tags=["
 api_router.include_router(tarjetas_credito.router, prefix="/tarjetas-credito", tags=["tarjetas-credito"])
 api_router.include_router(otros_creditos.router, prefix="/otros-creditos", tags=["otros-creditos"])
 api_router.include_router(alquileres.router, prefix="/alquileres", tags=["alquileres"])
-api_router.include_router(servicios.router, prefix="/servicios", tags=["servicios"]) 
\ No newline at end of file
+api_router.include_router(servicios.router, prefix="/servicios", tags=["servicios"]) 
+api_router.include_router(vencimientos.router, prefix="/vencimientos", tags=["vencimientos"])
+api_router.include_router(proyeccion.router, prefix="/proyeccion", tags=["proyeccion"])
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
@@ -0,0 +1,87 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Capa de escritura compartida por los routers: cada operacion es una sola
+# sentencia con RETURNING (INSERT/UPDATE/DELETE ... RETURNING *) filtrada por
+# id y, para los recursos de un usuario, por usuario_id. Si no hay fila
+# afectada se responde 404.
+
+def _filtros(modelo, id: int, usuario_id: Optional[int]) -> List[Any]:
+    filtros = [modelo.id == id]
+    if usuario_id is not None:
+        filtros.append(modelo.usuario_id == usuario_id)
+    return filtros
+
+def _no_encontrado(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+async def crear(db: AsyncSession, modelo, datos: Dict[str, Any], commit: bool = True):
+    obj = await db.scalar(insert(modelo).values(**datos).returning(modelo))
+    if commit:
+        await db.commit()
+    return obj
+
+async def actualizar(
+    db: AsyncSession, modelo, id: int, datos: Dict[str, Any], detail: str,
+    usuario_id: Optional[int] = None, commit: bool = True,
+):
+    filtros = _filtros(modelo, id, usuario_id)
+    if datos:
+        stmt = update(modelo).where(*filtros).values(**datos).returning(modelo)
+    else:
+        stmt = select(modelo).where(*filtros)
+    obj = await db.scalar(stmt.execution_options(populate_existing=True, synchronize_session=False))
+    if obj is None:
+        raise _no_encontrado(detail)
+    if commit:
+        await db.commit()
+    return obj
+
+async def actualizar_con_anterior(
+    db: AsyncSession, modelo, id: int, datos: Dict[str, Any], detail: str,
+    columnas: List[Any], usuario_id: Optional[int] = None, commit: bool = True,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Como ``actualizar`` pero devuelve tambien los valores previos de ``columnas``.
+
+    En PostgreSQL la fila previa se lee en un CTE (``SELECT ... FOR UPDATE``)
+    dentro del mismo UPDATE, asi que sigue siendo un unico round-trip. SQLite
+    no permite referenciar otras tablas en el RETURNING, ahi se lee antes.
+    """
+    filtros = _filtros(modelo, id, usuario_id)
+    claves = [columna.key for columna in columnas]
+    if db.get_bind().dialect.name == "sqlite":
+        previa = (await db.execute(select(*columnas).where(*filtros))).first()
+        if previa is None:
+            raise _no_encontrado(detail)
+        obj = await actualizar(db, modelo, id, datos, detail, usuario_id, commit)
+        return obj, dict(zip(claves, previa))
+
+    anterior = select(modelo.id, *columnas).where(*filtros).with_for_update().cte("anterior")
+    stmt = (
+        update(modelo)
+        .where(modelo.id == anterior.c.id)
+        .values(**datos)
+        .returning(modelo, *[anterior.c[clave] for clave in claves])
+    )
+    row = (await db.execute(stmt.execution_options(populate_existing=True, synchronize_session=False))).first()
+    if row is None:
+        raise _no_encontrado(detail)
+    if commit:
+        await db.commit()
+    obj, *valores = row
+    return obj, dict(zip(claves, valores))
+
+async def eliminar(
+    db: AsyncSession, modelo, id: int, detail: str,
+    usuario_id: Optional[int] = None, commit: bool = True,
+):
+    stmt = delete(modelo).where(*_filtros(modelo, id, usuario_id)).returning(modelo)
+    obj = await db.scalar(stmt.execution_options(synchronize_session=False))
+    if obj is None:
+        raise _no_encontrado(detail)
+    if commit:
+        await db.commit()
+    return obj
@@ -1,15 +1,54 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import Any, AsyncGenerator, Callable, Coroutine, Generator, Optional
+import asyncio
+import functools
+import os
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
+from jose import JWTError
+from pydantic import ValidationError
 
-from app.database.database import SessionLocal
+from app.core.cache import TTLCache
+from app.core.security import decode_access_token
+from app.database.database import (
+    SessionLocal, RequestSessionLocal, liberar_conexion_request, replica_engine, sesion_request,
+)
 from app.schemas.schemas import TokenData
 import app.models.models as models
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/usuarios/login")
 
+# Principals resolved by get_current_user, keyed by token subject (user id).
+# update_user/delete_user invalidate entries; the TTL bounds staleness across workers.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("USER_CACHE_TTL", 60)),
+)
+
+# Users that wrote recently, keyed by user id. Their reads stay on the primary for
+# REPLICA_STICKY_SECONDS so they see their own writes despite replication lag.
+# Like user_cache it is per worker: put sticky sessions in front of the workers
+# or raise the window if the lag can exceed it.
+escrituras_recientes = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("REPLICA_STICKY_SECONDS", 5)),
+)
+
+READ_METHODS = {"GET", "HEAD"}
+
+def marcar_escritura(user_id: int) -> None:
+    escrituras_recientes.set(user_id, True)
+
+def _token_subject(request: Request) -> Optional[int]:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return int(decode_access_token(token).get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+
 # Dependency to get DB session
 def get_db() -> Generator:
     db = SessionLocal()
@@ -18,9 +57,45 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+def usar_replica(request: Request) -> bool:
+    # GET/HEAD requests read from the replica unless the user wrote recently
+    if replica_engine is None or request.method not in READ_METHODS:
+        return False
+    user_id = _token_subject(request)
+    return user_id is None or escrituras_recientes.get(user_id) is None
+
+# Dependency to get async DB session. All the reads of a request share one
+# transaction; ReleaseSessionRoute ends it when the handler returns, so the
+# connection goes back to the pool before the response is serialized.
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with RequestSessionLocal(info={"replica": usar_replica(request)}) as db:
+        sesion_request.set(db)
+        yield db
+        sesion_request.set(None)
+    if replica_engine is not None and request.method not in READ_METHODS:
+        user_id = _token_subject(request)
+        if user_id is not None:
+            marcar_escritura(user_id)
+
+class ReleaseSessionRoute(APIRoute):
+    """Route that ends the request session's read transaction as soon as the
+    endpoint returns, before FastAPI validates and serializes its result."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def call(**values: Any) -> Any:
+                result = await endpoint(**values)
+                await liberar_conexion_request()
+                return result
+
+            self.dependant.call = call
+        return super().get_route_handler()
+
 # Dependency to get current user from token
 async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
 ) -> models.Usuario:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,18 +103,22 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        # Implement JWT validation logic here
-        payload = jwt.decode(token, "your-secret-key", algorithms=["HS256"])
-        email: str = payload.get("sub")
-        if email is None:
+        payload = decode_access_token(token)
+        subject: str = payload.get("sub")
+        if subject is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
+        token_data = TokenData(user_id=subject, email=payload.get("email"), rol=payload.get("rol"))
+    except (JWTError, ValidationError):
         raise credentials_exception
     
-    user = db.query(models.Usuario).filter(models.Usuario.email == token_data.email).first()
+    user = user_cache.get(token_data.user_id)
     if user is None:
-        raise credentials_exception
+        user = await db.get(models.Usuario, token_data.user_id)
+        if user is None:
+            raise credentials_exception
+        # Detached, so a rollback in this request cannot expire the cached principal
+        db.expunge(user)
+        user_cache.set(user.id, user)
     return user
 
 # Dependency to get admin user
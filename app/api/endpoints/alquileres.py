@@ -1,17 +1,40 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import date
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
-from app.models.models import Alquiler, Usuario
+from app.api import crud
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user
+from app.models.models import Alquiler, ContratoAlquiler, Usuario
 from app.schemas.schemas import AlquilerCreate, Alquiler as AlquilerSchema, AlquilerUpdate
+from app.schemas.schemas import ContratoAlquilerCreate, ContratoAlquiler as ContratoAlquilerSchema
+from app.schemas.schemas import CarteraPropiedad, GeneracionCuotas
+from app.core.response_cache import list_cache
+from app.core.responses import FastJSONResponse, ListSerializer
+from app.services.contratos_alquiler import cartera_por_propiedad, generar_cuotas
+from app.services.ipc import IPCNoDisponible
+from app.services.vencimientos import calendario_cache
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+alquileres_serializer = ListSerializer(AlquilerSchema)
+contratos_serializer = ListSerializer(ContratoAlquilerSchema)
+
+async def _generar(db: AsyncSession, usuario_id: int, contrato_ids: Optional[List[int]] = None) -> int:
+    try:
+        return await generar_cuotas(db, usuario_id, contrato_ids)
+    except IPCNoDisponible:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No hay indice de precios cargado para ajustar los contratos"
+        )
 
 @router.post("/", response_model=AlquilerSchema)
 async def create_alquiler(
     alquiler_in: AlquilerCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
     # Validate that the user is creating a rental for themselves
@@ -21,42 +44,101 @@ async def create_alquiler(
             detail="No tiene permiso para crear alquileres para otros usuarios"
         )
     
-    # Create new rental
-    db_alquiler = Alquiler(
-        cuota=alquiler_in.cuota,
-        vencimiento=alquiler_in.vencimiento,
-        inquilino=alquiler_in.inquilino,
-        deuda=alquiler_in.deuda,
-        pagado=alquiler_in.pagado,
-        propiedad=alquiler_in.propiedad,
-        recibo=alquiler_in.recibo,
-        usuario_id=alquiler_in.usuario_id
-    )
-    db.add(db_alquiler)
-    db.commit()
-    db.refresh(db_alquiler)
+    # Create new rental with a single INSERT ... RETURNING
+    db_alquiler = await crud.crear(db, Alquiler, alquiler_in.dict())
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "alquileres")
     return db_alquiler
 
-@router.get("/", response_model=List[AlquilerSchema])
+@router.get("/", response_model=List[AlquilerSchema], response_class=FastJSONResponse)
 async def read_alquileres(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    # Only return rentals for the current user
-    alquileres = db.query(Alquiler).filter(
-        Alquiler.usuario_id == current_user.id
-    ).order_by(Alquiler.vencimiento, Alquiler.inquilino).offset(skip).limit(limit).all()
-    return alquileres
+    async def render() -> Response:
+        # Only return rentals for the current user
+        result = await db.scalars(
+            select(Alquiler).where(
+                Alquiler.usuario_id == current_user.id
+            ).order_by(Alquiler.vencimiento, Alquiler.inquilino).offset(skip).limit(limit)
+        )
+        alquileres = result.all()
+        return await alquileres_serializer.response(alquileres)
+    
+    # Rendered pages cached per user; any write to alquileres bumps the version
+    return await list_cache.response(request, current_user.id, "alquileres", render)
+
+@router.post("/contratos", response_model=ContratoAlquilerSchema)
+async def create_contrato(
+    contrato_in: ContratoAlquilerCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    if contrato_in.usuario_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permiso para crear contratos para otros usuarios"
+        )
+    if contrato_in.indice == "fijo" and contrato_in.porcentaje_ajuste is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Los contratos con indice fijo requieren porcentaje_ajuste"
+        )
+    
+    # Contract and its whole adjusted schedule go in the same transaction
+    contrato = await crud.crear(db, ContratoAlquiler, contrato_in.dict(), commit=False)
+    await _generar(db, current_user.id, [contrato.id])
+    await db.commit()
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "alquileres")
+    return contrato
+
+@router.get("/contratos", response_model=List[ContratoAlquilerSchema], response_class=FastJSONResponse)
+async def read_contratos(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    result = await db.scalars(
+        select(ContratoAlquiler).where(
+            ContratoAlquiler.usuario_id == current_user.id
+        ).order_by(ContratoAlquiler.propiedad, ContratoAlquiler.inquilino)
+    )
+    return await contratos_serializer.response(result.all())
+
+@router.post("/contratos/generar", response_model=GeneracionCuotas)
+async def generar_cuotas_contratos(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    # Re-run every contract of the user in one batch (e.g. after loading new CPI values);
+    # installments already collected are kept
+    contratos = await db.scalar(
+        select(func.count()).select_from(ContratoAlquiler).where(ContratoAlquiler.usuario_id == current_user.id)
+    )
+    cuotas = await _generar(db, current_user.id)
+    await db.commit()
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "alquileres")
+    return {"contratos": contratos, "cuotas": cuotas}
+
+@router.get("/cartera", response_model=List[CarteraPropiedad], response_class=FastJSONResponse)
+async def read_cartera(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    # Rent roll by property, a single aggregate query
+    return FastJSONResponse(await cartera_por_propiedad(db, current_user.id, date.today()))
 
 @router.get("/{alquiler_id}", response_model=AlquilerSchema)
 async def read_alquiler(
     alquiler_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    alquiler = db.query(Alquiler).filter(Alquiler.id == alquiler_id).first()
+    alquiler = await db.get(Alquiler, alquiler_id)
     if not alquiler:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,53 +158,28 @@ async def read_alquiler(
 async def update_alquiler(
     alquiler_id: int,
     alquiler_in: AlquilerUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    alquiler = db.query(Alquiler).filter(Alquiler.id == alquiler_id).first()
-    if not alquiler:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Alquiler no encontrado"
-        )
-    
-    # Validate that the user is updating their own rental
-    if alquiler.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para modificar este alquiler"
-        )
-    
-    # Update rental data
-    alquiler_data = alquiler_in.dict(exclude_unset=True)
-    for key, value in alquiler_data.items():
-        setattr(alquiler, key, value)
-    
-    db.add(alquiler)
-    db.commit()
-    db.refresh(alquiler)
+    # Single UPDATE ... RETURNING filtered by owner; 404 if no row matches
+    alquiler = await crud.actualizar(
+        db, Alquiler, alquiler_id, alquiler_in.dict(exclude_unset=True),
+        detail="Alquiler no encontrado", usuario_id=current_user.id
+    )
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "alquileres")
     return alquiler
 
 @router.delete("/{alquiler_id}", response_model=AlquilerSchema)
 async def delete_alquiler(
     alquiler_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    alquiler = db.query(Alquiler).filter(Alquiler.id == alquiler_id).first()
-    if not alquiler:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Alquiler no encontrado"
-        )
-    
-    # Validate that the user is deleting their own rental
-    if alquiler.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para eliminar este alquiler"
-        )
-    
-    db.delete(alquiler)
-    db.commit()
-    return alquiler 
\ No newline at end of file
+    # Single DELETE ... RETURNING filtered by owner; 404 if no row matches
+    alquiler = await crud.eliminar(
+        db, Alquiler, alquiler_id, detail="Alquiler no encontrado", usuario_id=current_user.id
+    )
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "alquileres")
+    return alquiler
\ No newline at end of file
@@ -1,46 +1,53 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.api import crud
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user
 from app.models.models import Categoria, Usuario
 from app.schemas.schemas import CategoriaCreate, Categoria as CategoriaSchema, CategoriaUpdate
+from app.core.responses import FastJSONResponse, etag_matches, not_modified
+from app.services.catalogo_categorias import catalogo_categorias
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+async def confirmar_cambio(db: AsyncSession) -> None:
+    # Commit together with the NOTIFY for the other workers, then refresh this one
+    await catalogo_categorias.notificar(db)
+    await db.commit()
+    await catalogo_categorias.recargar()
 
 @router.post("/", response_model=CategoriaSchema)
 async def create_categoria(
     categoria_in: CategoriaCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    # Create new category
-    db_categoria = Categoria(
-        nombre=categoria_in.nombre,
-        tipo=categoria_in.tipo
-    )
-    db.add(db_categoria)
-    db.commit()
-    db.refresh(db_categoria)
+    # Create new category with a single INSERT ... RETURNING
+    db_categoria = await crud.crear(db, Categoria, categoria_in.dict(), commit=False)
+    await confirmar_cambio(db)
     return db_categoria
 
-@router.get("/", response_model=List[CategoriaSchema])
+@router.get("/", response_model=List[CategoriaSchema], response_class=FastJSONResponse)
 async def read_categorias(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    categorias = db.query(Categoria).offset(skip).limit(limit).all()
-    return categorias
+    # Served from the in-memory catalog; clients revalidate with If-None-Match
+    etag = await catalogo_categorias.etag_pagina(skip, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(await catalogo_categorias.listar(skip, limit), headers={"ETag": etag})
 
 @router.get("/{categoria_id}", response_model=CategoriaSchema)
 async def read_categoria(
     categoria_id: int,
-    db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
+    categoria = await catalogo_categorias.obtener(categoria_id)
     if not categoria:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -52,46 +59,35 @@ async def read_categoria(
 async def update_categoria(
     categoria_id: int,
     categoria_in: CategoriaUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
-    if not categoria:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Categoría no encontrada"
-        )
-    
-    # Update category data
-    categoria_data = categoria_in.dict(exclude_unset=True)
-    for key, value in categoria_data.items():
-        setattr(categoria, key, value)
-    
-    db.add(categoria)
-    db.commit()
-    db.refresh(categoria)
+    # Single UPDATE ... RETURNING; 404 if no row matches
+    categoria = await crud.actualizar(
+        db, Categoria, categoria_id, categoria_in.dict(exclude_unset=True),
+        detail="Categoría no encontrada",
+        commit=False,
+    )
+    await confirmar_cambio(db)
     return categoria
 
 @router.delete("/{categoria_id}", response_model=CategoriaSchema)
 async def delete_categoria(
     categoria_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
-    if not categoria:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Categoría no encontrada"
+    # Single DELETE ... RETURNING; the transacciones foreign key rejects
+    # deleting a category that is still in use
+    try:
+        categoria = await crud.eliminar(
+            db, Categoria, categoria_id, detail="Categoría no encontrada", commit=False
         )
-    
-    # Check if there are transactions using this category
-    if categoria.transacciones:
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No se puede eliminar la categoría porque tiene transacciones asociadas"
         )
-    
-    db.delete(categoria)
-    db.commit()
+    await confirmar_cambio(db)
     return categoria 
\ No newline at end of file
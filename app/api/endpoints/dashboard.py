@@ -0,0 +1,33 @@
+from datetime import date
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user
+from app.models.models import Usuario
+from app.schemas.schemas import Dashboard
+from app.core.responses import FastJSONResponse
+from app.services.dashboard import armar_dashboard
+from app.services.ipc import IPCNoDisponible, indice_ipc
+
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+@router.get("/", response_model=Dashboard, response_class=FastJSONResponse)
+async def read_dashboard(
+    ultimas: int = Query(10, ge=1, le=100),
+    dias: int = Query(30, ge=1, le=366),
+    ajuste: Optional[str] = Query(None, pattern="^ipc$"),
+    base: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    # Authenticated once; the queries run concurrently with a bounded number of connections
+    try:
+        serie_ipc = await indice_ipc.serie() if ajuste is not None else None
+        dashboard = await armar_dashboard(db, current_user, date.today(), ultimas, dias, serie_ipc, base)
+    except IPCNoDisponible:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hay indice de precios cargado para {base or 'el ajuste'}"
+        )
+    return FastJSONResponse(dashboard)
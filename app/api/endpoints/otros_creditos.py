@@ -1,17 +1,26 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.api import crud
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user
 from app.models.models import OtroCredito, Usuario
 from app.schemas.schemas import OtroCreditoCreate, OtroCredito as OtroCreditoSchema, OtroCreditoUpdate
+from app.schemas.schemas import CuotaCronograma, CronogramaMensual
+from app.core.response_cache import list_cache
+from app.core.responses import FastJSONResponse, ListSerializer
+from app.services.cronograma import cronograma_usuario, cuotas_como_filas, meses_como_filas
+from app.services.vencimientos import calendario_cache
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+creditos_serializer = ListSerializer(OtroCreditoSchema)
 
 @router.post("/", response_model=OtroCreditoSchema)
 async def create_otro_credito(
     credito_in: OtroCreditoCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
     # Validate that the user is creating a credit for themselves
@@ -21,41 +30,59 @@ async def create_otro_credito(
             detail="No tiene permiso para crear créditos para otros usuarios"
         )
     
-    # Create new credit
-    db_credito = OtroCredito(
-        cuotas=credito_in.cuotas,
-        vencimiento=credito_in.vencimiento,
-        detalle=credito_in.detalle,
-        deuda=credito_in.deuda,
-        pago=credito_in.pago,
-        medio_de_pago=credito_in.medio_de_pago,
-        usuario_id=credito_in.usuario_id
-    )
-    db.add(db_credito)
-    db.commit()
-    db.refresh(db_credito)
+    # Create new credit with a single INSERT ... RETURNING
+    db_credito = await crud.crear(db, OtroCredito, credito_in.dict())
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "otros_creditos")
     return db_credito
 
-@router.get("/", response_model=List[OtroCreditoSchema])
+@router.get("/", response_model=List[OtroCreditoSchema], response_class=FastJSONResponse)
 async def read_otros_creditos(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    async def render() -> Response:
+        # Only return credits for the current user
+        result = await db.scalars(
+            select(OtroCredito).where(
+                OtroCredito.usuario_id == current_user.id
+            ).order_by(OtroCredito.vencimiento).offset(skip).limit(limit)
+        )
+        creditos = result.all()
+        return await creditos_serializer.response(creditos)
+    
+    # Rendered pages cached per user; any write to otros_creditos bumps the version
+    return await list_cache.response(request, current_user.id, "otros_creditos", render)
+
+@router.get("/cronograma", response_model=List[CuotaCronograma], response_class=FastJSONResponse)
+async def read_cronograma(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    # Remaining installments of every unpaid credit, computed in one vectorized pass;
+    # rows are plain dicts built from the arrays and go straight to orjson
+    cronograma = await cronograma_usuario(db, OtroCredito, current_user.id)
+    return FastJSONResponse(cuotas_como_filas(cronograma))
+
+@router.get("/cronograma/mensual", response_model=List[CronogramaMensual], response_class=FastJSONResponse)
+async def read_cronograma_mensual(
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    # Only return credits for the current user
-    creditos = db.query(OtroCredito).filter(
-        OtroCredito.usuario_id == current_user.id
-    ).order_by(OtroCredito.vencimiento).offset(skip).limit(limit).all()
-    return creditos
+    # Same schedule aggregated by month: amount due and balance left after each month
+    cronograma = await cronograma_usuario(db, OtroCredito, current_user.id)
+    return FastJSONResponse(meses_como_filas(cronograma))
 
 @router.get("/{credito_id}", response_model=OtroCreditoSchema)
 async def read_otro_credito(
     credito_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    credito = db.query(OtroCredito).filter(OtroCredito.id == credito_id).first()
+    credito = await db.get(OtroCredito, credito_id)
     if not credito:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,53 +102,28 @@ async def read_otro_credito(
 async def update_otro_credito(
     credito_id: int,
     credito_in: OtroCreditoUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    credito = db.query(OtroCredito).filter(OtroCredito.id == credito_id).first()
-    if not credito:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Crédito no encontrado"
-        )
-    
-    # Validate that the user is updating their own credit
-    if credito.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para modificar este crédito"
-        )
-    
-    # Update credit data
-    credito_data = credito_in.dict(exclude_unset=True)
-    for key, value in credito_data.items():
-        setattr(credito, key, value)
-    
-    db.add(credito)
-    db.commit()
-    db.refresh(credito)
+    # Single UPDATE ... RETURNING filtered by owner; 404 if no row matches
+    credito = await crud.actualizar(
+        db, OtroCredito, credito_id, credito_in.dict(exclude_unset=True),
+        detail="Crédito no encontrado", usuario_id=current_user.id
+    )
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "otros_creditos")
     return credito
 
 @router.delete("/{credito_id}", response_model=OtroCreditoSchema)
 async def delete_otro_credito(
     credito_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    credito = db.query(OtroCredito).filter(OtroCredito.id == credito_id).first()
-    if not credito:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Crédito no encontrado"
-        )
-    
-    # Validate that the user is deleting their own credit
-    if credito.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para eliminar este crédito"
-        )
-    
-    db.delete(credito)
-    db.commit()
-    return credito 
\ No newline at end of file
+    # Single DELETE ... RETURNING filtered by owner; 404 if no row matches
+    credito = await crud.eliminar(
+        db, OtroCredito, credito_id, detail="Crédito no encontrado", usuario_id=current_user.id
+    )
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "otros_creditos")
+    return credito
\ No newline at end of file
@@ -0,0 +1,42 @@
+from typing import Any, List, Optional
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user
+from app.models.models import Usuario
+from app.schemas.schemas import ProyeccionMensual, ProyeccionMensualNormalizada
+from app.core.responses import FastJSONResponse, ListSerializer
+from app.services.ipc import IPCNoDisponible, deflactar, indice_ipc
+from app.services.proyeccion import proyeccion_usuario
+
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+proyeccion_normalizada_serializer = ListSerializer(ProyeccionMensualNormalizada)
+
+@router.get("/", response_model=List[ProyeccionMensual], response_class=FastJSONResponse)
+async def read_proyeccion(
+    meses: int = Query(12, ge=1, le=36),
+    ajuste: Optional[str] = Query(None, pattern="^ipc$"),
+    base: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    # Month-by-month cash-flow projection; recomputed only when the user's data changed
+    proyeccion = await proyeccion_usuario(db, current_user.id, meses)
+    if ajuste is None:
+        return FastJSONResponse(proyeccion)
+    
+    # Projected peso amounts deflated by CPI to the base month; months after the
+    # last published index use its last value
+    filas = orjson.loads(proyeccion)
+    try:
+        serie_ipc = await indice_ipc.serie()
+        for campo in ("ingresos", "egresos", "neto", "saldo_acumulado"):
+            deflactar(filas, "mes", campo, serie_ipc, base)
+    except IPCNoDisponible:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No hay indice de precios cargado para {base or 'el ajuste'}"
+        )
+    return await proyeccion_normalizada_serializer.response(filas)
@@ -1,17 +1,28 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.api import crud
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user
 from app.models.models import Servicio, Usuario
-from app.schemas.schemas import ServicioCreate, Servicio as ServicioSchema, ServicioUpdate
+from app.schemas.schemas import ServicioCreate, Servicio as ServicioSchema, ServicioUpdate, ServicioNormalizado
+from app.core.response_cache import list_cache
+from app.core.responses import FastJSONResponse, ListSerializer
+from app.services.cotizaciones import CotizacionNoDisponible, indice_cotizaciones, normalizar_servicios
+from app.services.cronograma import filas_de
+from app.services.ipc import IPCNoDisponible, deflactar, indice_ipc
+from app.services.vencimientos import calendario_cache
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+servicios_serializer = ListSerializer(ServicioSchema)
+normalizados_serializer = ListSerializer(ServicioNormalizado)
 
 @router.post("/", response_model=ServicioSchema)
 async def create_servicio(
     servicio_in: ServicioCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
     # Validate that the user is creating a service for themselves
@@ -21,41 +32,82 @@ async def create_servicio(
             detail="No tiene permiso para crear servicios para otros usuarios"
         )
     
-    # Create new service
-    db_servicio = Servicio(
-        vencimiento=servicio_in.vencimiento,
-        servicio=servicio_in.servicio,
-        detalle=servicio_in.detalle,
-        cuenta=servicio_in.cuenta,
-        monto_ars=servicio_in.monto_ars,
-        monto_usd=servicio_in.monto_usd,
-        usuario_id=servicio_in.usuario_id
-    )
-    db.add(db_servicio)
-    db.commit()
-    db.refresh(db_servicio)
+    # Create new service with a single INSERT ... RETURNING
+    db_servicio = await crud.crear(db, Servicio, servicio_in.dict())
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "servicios")
     return db_servicio
 
-@router.get("/", response_model=List[ServicioSchema])
+@router.get("/", response_model=List[ServicioSchema], response_class=FastJSONResponse)
 async def read_servicios(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    moneda: Optional[str] = Query(None, pattern="^(ARS|USD)$"),
+    serie: str = Query("oficial", pattern="^(oficial|mep|blue)$"),
+    ajuste: Optional[str] = Query(None, pattern="^ipc$"),
+    base: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    # Only return services for the current user
-    servicios = db.query(Servicio).filter(
-        Servicio.usuario_id == current_user.id
-    ).order_by(Servicio.vencimiento, Servicio.servicio).offset(skip).limit(limit).all()
-    return servicios
+    # Series for the requested normalization, loaded up front: their versions are part of the cache key
+    cotizaciones = ipc = None
+    if moneda is not None:
+        try:
+            cotizaciones = await indice_cotizaciones.serie(serie)
+        except CotizacionNoDisponible:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No hay cotizaciones cargadas para la serie {serie}"
+            )
+    if ajuste is not None:
+        try:
+            ipc = await indice_ipc.serie()
+        except IPCNoDisponible:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No hay indice de precios cargado para {base or 'el ajuste'}"
+            )
+
+    async def render() -> Response:
+        # Only return services for the current user
+        result = await db.scalars(
+            select(Servicio).where(
+                Servicio.usuario_id == current_user.id
+            ).order_by(Servicio.vencimiento, Servicio.servicio).offset(skip).limit(limit)
+        )
+        servicios = result.all()
+        if cotizaciones is None and ipc is None:
+            return await servicios_serializer.response(servicios)
+        filas = filas_de(servicios, Servicio)
+    
+        # Add each service's total in the requested currency, using the rate on its due date
+        if cotizaciones is not None:
+            normalizar_servicios(filas, cotizaciones, moneda)
+    
+        # Peso amounts deflated by CPI from their due month to the base month
+        if ipc is not None:
+            try:
+                deflactar(filas, "vencimiento", "monto_ars", ipc, base)
+            except IPCNoDisponible:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No hay indice de precios cargado para {base or 'el ajuste'}"
+                )
+        return await normalizados_serializer.response(filas)
+    
+    # Rendered pages cached per user; any write to servicios bumps the version,
+    # and a reload of the FX/CPI series changes the key of the normalized pages
+    variante = ":".join(cargada.version for cargada in (cotizaciones, ipc) if cargada is not None)
+    return await list_cache.response(request, current_user.id, "servicios", render, variante)
 
 @router.get("/{servicio_id}", response_model=ServicioSchema)
 async def read_servicio(
     servicio_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    servicio = db.query(Servicio).filter(Servicio.id == servicio_id).first()
+    servicio = await db.get(Servicio, servicio_id)
     if not servicio:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,53 +127,28 @@ async def read_servicio(
 async def update_servicio(
     servicio_id: int,
     servicio_in: ServicioUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    servicio = db.query(Servicio).filter(Servicio.id == servicio_id).first()
-    if not servicio:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Servicio no encontrado"
-        )
-    
-    # Validate that the user is updating their own service
-    if servicio.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para modificar este servicio"
-        )
-    
-    # Update service data
-    servicio_data = servicio_in.dict(exclude_unset=True)
-    for key, value in servicio_data.items():
-        setattr(servicio, key, value)
-    
-    db.add(servicio)
-    db.commit()
-    db.refresh(servicio)
+    # Single UPDATE ... RETURNING filtered by owner; 404 if no row matches
+    servicio = await crud.actualizar(
+        db, Servicio, servicio_id, servicio_in.dict(exclude_unset=True),
+        detail="Servicio no encontrado", usuario_id=current_user.id
+    )
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "servicios")
     return servicio
 
 @router.delete("/{servicio_id}", response_model=ServicioSchema)
 async def delete_servicio(
     servicio_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    servicio = db.query(Servicio).filter(Servicio.id == servicio_id).first()
-    if not servicio:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Servicio no encontrado"
-        )
-    
-    # Validate that the user is deleting their own service
-    if servicio.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para eliminar este servicio"
-        )
-    
-    db.delete(servicio)
-    db.commit()
-    return servicio 
\ No newline at end of file
+    # Single DELETE ... RETURNING filtered by owner; 404 if no row matches
+    servicio = await crud.eliminar(
+        db, Servicio, servicio_id, detail="Servicio no encontrado", usuario_id=current_user.id
+    )
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "servicios")
+    return servicio
\ No newline at end of file
@@ -1,17 +1,26 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.api import crud
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user
 from app.models.models import TarjetaCredito, Usuario
 from app.schemas.schemas import TarjetaCreditoCreate, TarjetaCredito as TarjetaCreditoSchema, TarjetaCreditoUpdate
+from app.schemas.schemas import CuotaCronograma, CronogramaMensual
+from app.core.response_cache import list_cache
+from app.core.responses import FastJSONResponse, ListSerializer
+from app.services.cronograma import cronograma_usuario, cuotas_como_filas, meses_como_filas
+from app.services.vencimientos import calendario_cache
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+tarjetas_serializer = ListSerializer(TarjetaCreditoSchema)
 
 @router.post("/", response_model=TarjetaCreditoSchema)
 async def create_tarjeta_credito(
     tarjeta_in: TarjetaCreditoCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
     # Validate that the user is creating a credit card for themselves
@@ -21,41 +30,59 @@ async def create_tarjeta_credito(
             detail="No tiene permiso para crear tarjetas de crédito para otros usuarios"
         )
     
-    # Create new credit card
-    db_tarjeta = TarjetaCredito(
-        cuotas=tarjeta_in.cuotas,
-        vencimiento=tarjeta_in.vencimiento,
-        detalle=tarjeta_in.detalle,
-        deuda=tarjeta_in.deuda,
-        pago=tarjeta_in.pago,
-        medio_de_pago=tarjeta_in.medio_de_pago,
-        usuario_id=tarjeta_in.usuario_id
-    )
-    db.add(db_tarjeta)
-    db.commit()
-    db.refresh(db_tarjeta)
+    # Create new credit card with a single INSERT ... RETURNING
+    db_tarjeta = await crud.crear(db, TarjetaCredito, tarjeta_in.dict())
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "tarjetas_credito")
     return db_tarjeta
 
-@router.get("/", response_model=List[TarjetaCreditoSchema])
+@router.get("/", response_model=List[TarjetaCreditoSchema], response_class=FastJSONResponse)
 async def read_tarjetas_credito(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    async def render() -> Response:
+        # Only return credit cards for the current user
+        result = await db.scalars(
+            select(TarjetaCredito).where(
+                TarjetaCredito.usuario_id == current_user.id
+            ).order_by(TarjetaCredito.vencimiento).offset(skip).limit(limit)
+        )
+        tarjetas = result.all()
+        return await tarjetas_serializer.response(tarjetas)
+    
+    # Rendered pages cached per user; any write to tarjetas_credito bumps the version
+    return await list_cache.response(request, current_user.id, "tarjetas_credito", render)
+
+@router.get("/cronograma", response_model=List[CuotaCronograma], response_class=FastJSONResponse)
+async def read_cronograma(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    # Remaining installments of every unpaid credit, computed in one vectorized pass;
+    # rows are plain dicts built from the arrays and go straight to orjson
+    cronograma = await cronograma_usuario(db, TarjetaCredito, current_user.id)
+    return FastJSONResponse(cuotas_como_filas(cronograma))
+
+@router.get("/cronograma/mensual", response_model=List[CronogramaMensual], response_class=FastJSONResponse)
+async def read_cronograma_mensual(
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    # Only return credit cards for the current user
-    tarjetas = db.query(TarjetaCredito).filter(
-        TarjetaCredito.usuario_id == current_user.id
-    ).order_by(TarjetaCredito.vencimiento).offset(skip).limit(limit).all()
-    return tarjetas
+    # Same schedule aggregated by month: amount due and balance left after each month
+    cronograma = await cronograma_usuario(db, TarjetaCredito, current_user.id)
+    return FastJSONResponse(meses_como_filas(cronograma))
 
 @router.get("/{tarjeta_id}", response_model=TarjetaCreditoSchema)
 async def read_tarjeta_credito(
     tarjeta_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    tarjeta = db.query(TarjetaCredito).filter(TarjetaCredito.id == tarjeta_id).first()
+    tarjeta = await db.get(TarjetaCredito, tarjeta_id)
     if not tarjeta:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,53 +102,28 @@ async def read_tarjeta_credito(
 async def update_tarjeta_credito(
     tarjeta_id: int,
     tarjeta_in: TarjetaCreditoUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    tarjeta = db.query(TarjetaCredito).filter(TarjetaCredito.id == tarjeta_id).first()
-    if not tarjeta:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tarjeta de crédito no encontrada"
-        )
-    
-    # Validate that the user is updating their own credit card
-    if tarjeta.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para modificar esta tarjeta de crédito"
-        )
-    
-    # Update credit card data
-    tarjeta_data = tarjeta_in.dict(exclude_unset=True)
-    for key, value in tarjeta_data.items():
-        setattr(tarjeta, key, value)
-    
-    db.add(tarjeta)
-    db.commit()
-    db.refresh(tarjeta)
+    # Single UPDATE ... RETURNING filtered by owner; 404 if no row matches
+    tarjeta = await crud.actualizar(
+        db, TarjetaCredito, tarjeta_id, tarjeta_in.dict(exclude_unset=True),
+        detail="Tarjeta de crédito no encontrada", usuario_id=current_user.id
+    )
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "tarjetas_credito")
     return tarjeta
 
 @router.delete("/{tarjeta_id}", response_model=TarjetaCreditoSchema)
 async def delete_tarjeta_credito(
     tarjeta_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    tarjeta = db.query(TarjetaCredito).filter(TarjetaCredito.id == tarjeta_id).first()
-    if not tarjeta:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tarjeta de crédito no encontrada"
-        )
-    
-    # Validate that the user is deleting their own credit card
-    if tarjeta.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para eliminar esta tarjeta de crédito"
-        )
-    
-    db.delete(tarjeta)
-    db.commit()
-    return tarjeta 
\ No newline at end of file
+    # Single DELETE ... RETURNING filtered by owner; 404 if no row matches
+    tarjeta = await crud.eliminar(
+        db, TarjetaCredito, tarjeta_id, detail="Tarjeta de crédito no encontrada", usuario_id=current_user.id
+    )
+    calendario_cache.pop(current_user.id)
+    list_cache.bump(current_user.id, "tarjetas_credito")
+    return tarjeta
\ No newline at end of file
@@ -1,21 +1,82 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import base64
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
-from app.models.models import Transaccion, Usuario, Categoria
+from app.api import crud
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user, usar_replica
+from app.core.response_cache import list_cache
+from app.core.responses import FastJSONResponse, ListSerializer
+from app.database.database import RequestSessionLocal
+from app.models.models import Transaccion, Usuario, ResumenMensual
 from app.schemas.schemas import TransaccionCreate, Transaccion as TransaccionSchema, TransaccionUpdate
+from app.schemas.schemas import ResumenMensual as ResumenMensualSchema, ResumenMensualNormalizado
+from app.schemas.schemas import TransaccionBulkError, TransaccionBulkResultado
+from app.services.catalogo_categorias import catalogo_categorias
+from app.services.cotizaciones import CotizacionNoDisponible, indice_cotizaciones, normalizar_resumen
+from app.services.ipc import IPCNoDisponible, deflactar, indice_ipc
+from app.services.cronograma import filas_de
+from app.services.importacion import insertar_transacciones
+from app.services.resumen_mensual import aplicar_lote, aplicar_transaccion, primer_dia_del_mes
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+async def categoria_eliminada(db: AsyncSession) -> HTTPException:
+    # The category passed the in-memory catalog check but was deleted on another
+    # worker before its NOTIFY arrived: the foreign key rejected the write
+    await db.rollback()
+    await catalogo_categorias.recargar()
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Categoría no encontrada"
+    )
+
+transacciones_serializer = ListSerializer(TransaccionSchema)
+resumen_serializer = ListSerializer(ResumenMensualSchema)
+resumen_normalizado_serializer = ListSerializer(ResumenMensualNormalizado)
+
+BULK_MAX_FILAS = 50000
+EXPORT_YIELD_PER = 1000
+EXPORT_COLUMNAS = [
+    Transaccion.id, Transaccion.fecha, Transaccion.tipo, Transaccion.categoria_id, Transaccion.detalle,
+    Transaccion.monto, Transaccion.medio_de_pago, Transaccion.created_at, Transaccion.updated_at,
+]
+# Columns that identify a transaction's row in resumen_mensual
+COLUMNAS_RESUMEN = [
+    Transaccion.usuario_id, Transaccion.fecha, Transaccion.categoria_id, Transaccion.tipo, Transaccion.monto,
+]
+
+def encode_cursor(transaccion: Transaccion) -> str:
+    raw = json.dumps([transaccion.fecha.isoformat(), transaccion.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    try:
+        fecha, transaccion_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(fecha), int(transaccion_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
 
 @router.post("/", response_model=TransaccionSchema)
 async def create_transaccion(
     transaccion_in: TransaccionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    # Check if the category exists
-    categoria = db.query(Categoria).filter(Categoria.id == transaccion_in.categoria_id).first()
+    # Check if the category exists (in-memory catalog, no query)
+    categoria = await catalogo_categorias.obtener(transaccion_in.categoria_id)
     if not categoria:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -29,50 +90,214 @@ async def create_transaccion(
             detail="No tiene permiso para crear transacciones para otros usuarios"
         )
     
-    # Create new transaction
-    db_transaccion = Transaccion(
-        fecha=transaccion_in.fecha,
-        tipo=transaccion_in.tipo,
-        categoria_id=transaccion_in.categoria_id,
-        detalle=transaccion_in.detalle,
-        monto=transaccion_in.monto,
-        medio_de_pago=transaccion_in.medio_de_pago,
-        usuario_id=transaccion_in.usuario_id
-    )
-    db.add(db_transaccion)
-    db.commit()
-    db.refresh(db_transaccion)
+    # Create new transaction (INSERT ... RETURNING) and add it to the summary
+    try:
+        db_transaccion = await crud.crear(db, Transaccion, transaccion_in.dict(), commit=False)
+        await aplicar_transaccion(db, db_transaccion, 1)
+        await db.commit()
+    except IntegrityError:
+        raise await categoria_eliminada(db)
+    list_cache.bump(current_user.id, "transacciones")
     return db_transaccion
 
-@router.get("/", response_model=List[TransaccionSchema])
+@router.post("/bulk", response_model=TransaccionBulkResultado)
+async def create_transacciones_bulk(
+    transacciones_in: List[TransaccionCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    if len(transacciones_in) > BULK_MAX_FILAS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Se permiten como máximo {BULK_MAX_FILAS} transacciones por lote"
+        )
+    
+    # Validate every referenced category against the in-memory catalog
+    categorias_existentes = await catalogo_categorias.existentes()
+    
+    validas = []
+    errores = []
+    for indice, transaccion_in in enumerate(transacciones_in):
+        if transaccion_in.usuario_id != current_user.id:
+            errores.append(TransaccionBulkError(
+                indice=indice,
+                detalle="No tiene permiso para crear transacciones para otros usuarios"
+            ))
+        elif transaccion_in.categoria_id not in categorias_existentes:
+            errores.append(TransaccionBulkError(indice=indice, detalle="Categoría no encontrada"))
+        else:
+            validas.append(transaccion_in)
+    
+    # Insert the valid rows and update the monthly rollup in one transaction
+    if validas:
+        try:
+            await insertar_transacciones(db, validas)
+            await aplicar_lote(db, validas)
+            await db.commit()
+        except IntegrityError:
+            raise await categoria_eliminada(db)
+        list_cache.bump(current_user.id, "transacciones")
+    return TransaccionBulkResultado(insertadas=len(validas), errores=errores)
+
+@router.get("/", response_model=List[TransaccionSchema], response_class=FastJSONResponse)
 async def read_transacciones(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     tipo: str = None,
     categoria_id: int = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    # Build query
-    query = db.query(Transaccion).filter(Transaccion.usuario_id == current_user.id)
+    async def render() -> Response:
+        # Build query
+        query = select(Transaccion).where(Transaccion.usuario_id == current_user.id)
     
-    # Apply filters if provided
+        # Apply filters if provided
+        if tipo:
+            query = query.where(Transaccion.tipo == tipo)
+        if categoria_id:
+            query = query.where(Transaccion.categoria_id == categoria_id)
+    
+        # Apply pagination: keyset on (fecha, id) when a cursor is given, offset otherwise
+        if cursor:
+            fecha, transaccion_id = decode_cursor(cursor)
+            query = query.where(tuple_(Transaccion.fecha, Transaccion.id) < tuple_(fecha, transaccion_id))
+        else:
+            query = query.offset(skip)
+        query = query.order_by(Transaccion.fecha.desc(), Transaccion.id.desc()).limit(limit)
+        result = await db.scalars(query)
+        transacciones = result.all()
+    
+        # A full page means there may be more rows after the last one
+        headers = {}
+        if transacciones and len(transacciones) == limit:
+            headers["X-Next-Cursor"] = encode_cursor(transacciones[-1])
+        return await transacciones_serializer.response(transacciones, headers=headers)
+    
+    # Rendered pages cached per user; any write to transacciones bumps the version
+    return await list_cache.response(request, current_user.id, "transacciones", render)
+
+@router.get("/resumen", response_model=List[ResumenMensualSchema], response_class=FastJSONResponse)
+async def read_resumen_mensual(
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    tipo: str = None,
+    categoria_id: int = None,
+    moneda: Optional[str] = Query(None, pattern="^(ARS|USD)$"),
+    serie: str = Query("oficial", pattern="^(oficial|mep|blue)$"),
+    ajuste: Optional[str] = Query(None, pattern="^ipc$"),
+    base: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    # Served from the incrementally maintained rollup: O(months x categories)
+    query = select(ResumenMensual).where(
+        ResumenMensual.usuario_id == current_user.id,
+        ResumenMensual.cantidad > 0
+    )
+    if desde:
+        query = query.where(ResumenMensual.mes >= primer_dia_del_mes(desde))
+    if hasta:
+        query = query.where(ResumenMensual.mes <= hasta)
     if tipo:
-        query = query.filter(Transaccion.tipo == tipo)
+        query = query.where(ResumenMensual.tipo == tipo)
     if categoria_id:
-        query = query.filter(Transaccion.categoria_id == categoria_id)
+        query = query.where(ResumenMensual.categoria_id == categoria_id)
     
-    # Apply pagination
-    transacciones = query.order_by(Transaccion.fecha.desc()).offset(skip).limit(limit).all()
-    return transacciones
+    result = await db.scalars(
+        query.order_by(ResumenMensual.mes, ResumenMensual.categoria_id, ResumenMensual.tipo)
+    )
+    filas = result.all()
+    if moneda is None and ajuste is None:
+        return await resumen_serializer.response(filas)
+    filas = filas_de(filas, ResumenMensual)
+    
+    # Amounts are stored in pesos; convert each month with the rate at its close
+    if moneda is not None:
+        try:
+            cotizaciones = await indice_cotizaciones.serie(serie)
+        except CotizacionNoDisponible:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No hay cotizaciones cargadas para la serie {serie}"
+            )
+        normalizar_resumen(filas, cotizaciones, moneda)
+    
+    # Monthly peso totals deflated by CPI to the base month, all buckets at once
+    if ajuste is not None:
+        try:
+            deflactar(filas, "mes", "total", await indice_ipc.serie(), base)
+        except IPCNoDisponible:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No hay indice de precios cargado para {base or 'el ajuste'}"
+            )
+    return await resumen_normalizado_serializer.response(filas)
+
+def json_default(value: Any) -> Any:
+    # Money columns come back as Decimal; keep them numbers like the JSON API does
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+async def exportar_filas(
+    usuario_id: int, tipo: Optional[str], categoria_id: Optional[int], formato: str, replica: bool = False
+) -> AsyncIterator[bytes]:
+    # The request-scoped session is closed before the body is streamed, so the export
+    # opens its own, routed to the replica like the request's would be
+    async with RequestSessionLocal(info={"replica": replica}) as db:
+        query = select(*EXPORT_COLUMNAS).where(Transaccion.usuario_id == usuario_id)
+        if tipo:
+            query = query.where(Transaccion.tipo == tipo)
+        if categoria_id:
+            query = query.where(Transaccion.categoria_id == categoria_id)
+        query = query.order_by(Transaccion.fecha.desc(), Transaccion.id.desc())
+        
+        # Server-side cursor: only EXPORT_YIELD_PER rows are in memory at a time
+        result = await db.stream(query.execution_options(yield_per=EXPORT_YIELD_PER))
+        nombres = [columna.key for columna in EXPORT_COLUMNAS]
+        if formato == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(nombres)
+            async for filas in result.partitions():
+                writer.writerows(filas)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue().encode()
+        else:
+            async for filas in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(nombres, fila)), default=json_default) + "\n" for fila in filas
+                ).encode()
+
+@router.get("/export")
+async def export_transacciones(
+    request: Request,
+    formato: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    tipo: str = None,
+    categoria_id: int = None,
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    media_type = "text/csv" if formato == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        exportar_filas(current_user.id, tipo, categoria_id, formato, replica=usar_replica(request)),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=transacciones.{formato}"},
+    )
 
 @router.get("/{transaccion_id}", response_model=TransaccionSchema)
 async def read_transaccion(
     transaccion_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    transaccion = db.query(Transaccion).filter(Transaccion.id == transaccion_id).first()
+    transaccion = await db.get(Transaccion, transaccion_id)
     if not transaccion:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,62 +317,55 @@ async def read_transaccion(
 async def update_transaccion(
     transaccion_id: int,
     transaccion_in: TransaccionUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    transaccion = db.query(Transaccion).filter(Transaccion.id == transaccion_id).first()
-    if not transaccion:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transacción no encontrada"
-        )
-    
-    # Validate that the user is updating their own transaction
-    if transaccion.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para modificar esta transacción"
-        )
-    
     # Check if the category exists if it's being updated
     if transaccion_in.categoria_id is not None:
-        categoria = db.query(Categoria).filter(Categoria.id == transaccion_in.categoria_id).first()
+        categoria = await catalogo_categorias.obtener(transaccion_in.categoria_id)
         if not categoria:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Categoría no encontrada"
             )
     
-    # Update transaction data
     transaccion_data = transaccion_in.dict(exclude_unset=True)
-    for key, value in transaccion_data.items():
-        setattr(transaccion, key, value)
+    if not transaccion_data:
+        return await crud.actualizar(
+            db, Transaccion, transaccion_id, transaccion_data,
+            detail="Transacción no encontrada", usuario_id=current_user.id,
+        )
     
-    db.add(transaccion)
-    db.commit()
-    db.refresh(transaccion)
+    # Single UPDATE ... RETURNING that also returns the previous values,
+    # so the amount can be moved between summary rows
+    try:
+        transaccion, anterior = await crud.actualizar_con_anterior(
+            db, Transaccion, transaccion_id, transaccion_data,
+            detail="Transacción no encontrada",
+            columnas=COLUMNAS_RESUMEN,
+            usuario_id=current_user.id,
+            commit=False,
+        )
+        await aplicar_transaccion(db, SimpleNamespace(**anterior), -1)
+        await aplicar_transaccion(db, transaccion, 1)
+        await db.commit()
+    except IntegrityError:
+        raise await categoria_eliminada(db)
+    list_cache.bump(current_user.id, "transacciones")
     return transaccion
 
 @router.delete("/{transaccion_id}", response_model=TransaccionSchema)
 async def delete_transaccion(
     transaccion_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
-    transaccion = db.query(Transaccion).filter(Transaccion.id == transaccion_id).first()
-    if not transaccion:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Transacción no encontrada"
-        )
-    
-    # Validate that the user is deleting their own transaction
-    if transaccion.usuario_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tiene permiso para eliminar esta transacción"
-        )
-    
-    db.delete(transaccion)
-    db.commit()
+    # DELETE ... RETURNING, then remove it from the summary
+    transaccion = await crud.eliminar(
+        db, Transaccion, transaccion_id,
+        detail="Transacción no encontrada", usuario_id=current_user.id, commit=False,
+    )
+    await aplicar_transaccion(db, transaccion, -1)
+    await db.commit()
+    list_cache.bump(current_user.id, "transacciones")
     return transaccion 
\ No newline at end of file
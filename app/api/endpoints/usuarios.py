@@ -1,92 +1,112 @@
-from datetime import timedelta
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 
-from app.api.deps import get_db, get_current_user, get_current_admin_user
+from app.api import crud
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user, get_current_admin_user, marcar_escritura, user_cache
+from app.core.password_pool import password_pool, PasswordPoolSaturated
+from app.core.security import create_access_token
 from app.models.models import Usuario, RolUsuario
 from app.schemas.schemas import UsuarioCreate, Usuario as UsuarioSchema, UsuarioUpdate, Token
+from app.core.responses import FastJSONResponse, ListSerializer
 
-router = APIRouter()
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+usuarios_serializer = ListSerializer(UsuarioSchema)
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# JWT configs
-SECRET_KEY = "your-secret-key"  # Change in production!
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
-def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
-    to_encode = data.copy()
-    expire = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    if expires_delta:
-        expire = expires_delta
-    to_encode.update({"exp": timedelta(minutes=15) + expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+async def run_in_password_pool(func, *args):
+    # bcrypt runs in a bounded worker pool so it doesn't block the event loop
+    try:
+        return await password_pool.run(func, *args)
+    except PasswordPoolSaturated:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, intente nuevamente",
+            headers={"Retry-After": "1"},
+        )
 
-def authenticate_user(db: Session, email: str, password: str) -> Usuario:
-    user = db.query(Usuario).filter(Usuario.email == email).first()
-    if not user or not verify_password(password, user.contrasena):
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Usuario:
+    user = await db.scalar(select(Usuario).where(Usuario.email == email))
+    # End the read so no pooled connection is held while the password is verified;
+    # the detached user keeps its loaded attributes for the token and the cache
+    if user is not None:
+        db.expunge(user)
+    await db.rollback()
+    if not user or not await run_in_password_pool(verify_password, password, user.contrasena):
         return None
     return user
 
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.email})
+    # The token carries id and role so get_current_user can resolve it from cache
+    access_token = create_access_token(
+        data={"sub": str(user.id), "email": user.email, "rol": user.rol}
+    )
+    user_cache.set(user.id, user)
+    # A user who just signed up may not be on the replica yet
+    marcar_escritura(user.id)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/", response_model=UsuarioSchema)
 async def create_user(
-    user_in: UsuarioCreate, db: Session = Depends(get_db)
+    user_in: UsuarioCreate, db: AsyncSession = Depends(get_async_db)
 ) -> Any:
-    # Check if user with the email already exists
-    db_user = db.query(Usuario).filter(Usuario.email == user_in.email).first()
-    if db_user:
+    # Reject known duplicates before spending a hashing slot on them
+    existente = await db.scalar(select(Usuario.id).where(Usuario.email == user_in.email))
+    # End the read so no pooled connection is held while the password is hashed
+    await db.rollback()
+    if existente is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
+        )
+    # Create new user; the unique index on email still rejects concurrent duplicates
+    hashed_password = await run_in_password_pool(get_password_hash, user_in.contrasena)
+    try:
+        db_user = await crud.crear(db, Usuario, {
+            "email": user_in.email,
+            "nombre": user_in.nombre,
+            "contrasena": hashed_password,
+            "rol": user_in.rol,
+        })
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    
-    # Create new user
-    hashed_password = get_password_hash(user_in.contrasena)
-    db_user = Usuario(
-        email=user_in.email,
-        nombre=user_in.nombre,
-        contrasena=hashed_password,
-        rol=user_in.rol
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
     return db_user
 
-@router.get("/", response_model=List[UsuarioSchema])
+@router.get("/", response_model=List[UsuarioSchema], response_class=FastJSONResponse)
 async def read_users(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db),
+    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_admin_user)
 ) -> Any:
-    users = db.query(Usuario).offset(skip).limit(limit).all()
-    return users
+    result = await db.scalars(select(Usuario).offset(skip).limit(limit))
+    users = result.all()
+    return await usuarios_serializer.response(users)
 
 @router.get("/me", response_model=UsuarioSchema)
 async def read_user_me(
@@ -96,7 +116,7 @@ async def read_user_me(
 
 @router.get("/{user_id}", response_model=UsuarioSchema)
 async def read_user(
-    user_id: int, db: Session = Depends(get_db),
+    user_id: int, db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
     # Regular users can only access their own data
@@ -106,7 +126,7 @@ async def read_user(
             detail="Not enough permissions"
         )
     
-    user = db.query(Usuario).filter(Usuario.id == user_id).first()
+    user = await db.get(Usuario, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -116,7 +136,7 @@ async def read_user(
 
 @router.put("/{user_id}", response_model=UsuarioSchema)
 async def update_user(
-    user_id: int, user_in: UsuarioUpdate, db: Session = Depends(get_db),
+    user_id: int, user_in: UsuarioUpdate, db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_user)
 ) -> Any:
     # Regular users can only update their own data
@@ -126,35 +146,25 @@ async def update_user(
             detail="Not enough permissions"
         )
     
-    user = db.query(Usuario).filter(Usuario.id == user_id).first()
-    if not user:
+    # Single UPDATE ... RETURNING; 404 if no row matches
+    try:
+        user = await crud.actualizar(
+            db, Usuario, user_id, user_in.dict(exclude_unset=True), detail="User not found"
+        )
+    except IntegrityError:
+        await db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
         )
-    
-    # Update user data
-    user_data = user_in.dict(exclude_unset=True)
-    for key, value in user_data.items():
-        setattr(user, key, value)
-    
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    user_cache.pop(user.id)
     return user
 
 @router.delete("/{user_id}", response_model=UsuarioSchema)
 async def delete_user(
-    user_id: int, db: Session = Depends(get_db),
+    user_id: int, db: AsyncSession = Depends(get_async_db),
     current_user: Usuario = Depends(get_current_admin_user)
 ) -> Any:
-    user = db.query(Usuario).filter(Usuario.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    db.delete(user)
-    db.commit()
+    user = await crud.eliminar(db, Usuario, user_id, detail="User not found")
+    user_cache.pop(user.id)
     return user 
\ No newline at end of file
@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import ReleaseSessionRoute, get_async_db, get_current_user
+from app.models.models import Usuario
+from app.schemas.schemas import Vencimiento
+from app.core.responses import FastJSONResponse, etag_matches, not_modified
+from app.services.vencimientos import calendario, listar_vencimientos, vencimientos_json
+
+router = APIRouter(route_class=ReleaseSessionRoute)
+
+VENCIMIENTOS_DIAS_POR_DEFECTO = 30
+VENCIMIENTOS_MAX_DIAS = 366
+
+@router.get("/", response_model=List[Vencimiento], response_class=FastJSONResponse)
+async def read_vencimientos(
+    request: Request,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    solo_impagos: bool = False,
+    format: str = Query("json", pattern="^(json|ics)$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Any:
+    desde = desde or date.today()
+    hasta = hasta or desde + timedelta(days=VENCIMIENTOS_DIAS_POR_DEFECTO)
+    if hasta < desde:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha 'hasta' debe ser posterior a 'desde'"
+        )
+    if (hasta - desde).days > VENCIMIENTOS_MAX_DIAS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango no puede superar {VENCIMIENTOS_MAX_DIAS} días"
+        )
+    
+    if format == "ics":
+        # iCalendar rendering, cached per user and revalidated with the ETag
+        etag, ics = await calendario(db, current_user.id, desde, hasta, solo_impagos)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return Response(
+            ics,
+            media_type="text/calendar; charset=utf-8",
+            headers={"ETag": etag, "Content-Disposition": 'inline; filename="vencimientos.ics"'},
+        )
+    
+    # Credit cards, other credits, rents and services due in the range, one UNION ALL query
+    vencimientos = await listar_vencimientos(db, current_user.id, desde, hasta, solo_impagos)
+    return FastJSONResponse(vencimientos_json(vencimientos))
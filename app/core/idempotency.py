@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from jose import JWTError
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.datastructures import Headers
+
+from app.core.cache import TTLCache
+from app.core.security import decode_access_token
+from app.database.database import AsyncSessionLocal
+from app.models.models import ClaveIdempotencia
+
+load_dotenv()
+
+# Cuanto tiempo se puede reintentar un POST con la misma Idempotency-Key (segundos)
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 86400))
+# Cuanto espera un duplicado a que otro worker termine el request original (segundos)
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", 10))
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# Respuestas que llevan credenciales (el token de acceso): nunca se guardan ni se
+# repiten; la Idempotency-Key se ignora y el request se procesa normalmente
+RUTAS_EXCLUIDAS = ("/usuarios/login",)
+
+# clave -> (huella, estado, encabezados, cuerpo), copia local de la tabla claves_idempotencia
+respuestas_idempotentes = TTLCache(
+    maxsize=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 10000)),
+    ttl=IDEMPOTENCY_TTL,
+)
+
+Respuesta = Tuple[str, int, List[List[str]], bytes]
+
+
+def _sha256(*partes: bytes) -> str:
+    return hashlib.sha256(b"\0".join(partes)).hexdigest()
+
+
+def _usuario(headers: Headers) -> Optional[bytes]:
+    """Sujeto del token si es valido, o ``None`` si el request es anonimo.
+
+    Las claves quedan separadas por usuario aunque el cliente renueve el token.
+    """
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            sub = decode_access_token(token).get("sub")
+        except JWTError:
+            return None
+        if sub is not None:
+            return str(sub).encode()
+    return None
+
+
+async def _reclamar(clave: str, huella: str) -> Optional[ClaveIdempotencia]:
+    """Registra la clave como en proceso; si ya existia devuelve la fila guardada."""
+    ahora = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+        await db.execute(delete(ClaveIdempotencia).where(
+            ClaveIdempotencia.clave == clave, ClaveIdempotencia.expira_en < ahora
+        ))
+        reclamada = await db.scalar(
+            insert(ClaveIdempotencia)
+            .values(clave=clave, huella=huella, expira_en=ahora + timedelta(seconds=IDEMPOTENCY_TTL))
+            .on_conflict_do_nothing(index_elements=[ClaveIdempotencia.clave])
+            .returning(ClaveIdempotencia.clave)
+        )
+        existente = None if reclamada else await db.get(ClaveIdempotencia, clave)
+        await db.commit()
+        return existente
+
+
+async def _buscar(clave: str) -> Optional[ClaveIdempotencia]:
+    async with AsyncSessionLocal() as db:
+        return await db.get(ClaveIdempotencia, clave)
+
+
+async def _guardar(clave: str, respuesta: Respuesta) -> None:
+    _, estado, encabezados, cuerpo = respuesta
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(ClaveIdempotencia).where(ClaveIdempotencia.clave == clave)
+            .values(estado=estado, encabezados=json.dumps(encabezados), cuerpo=cuerpo)
+        )
+        await db.commit()
+
+
+async def _liberar(clave: str) -> None:
+    """Borra la clave en proceso para que el cliente pueda reintentar (error del servidor)."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(ClaveIdempotencia).where(ClaveIdempotencia.clave == clave))
+        await db.commit()
+
+
+async def purgar_vencidas() -> int:
+    """Borra las claves vencidas de la tabla; devuelve cuantas borro."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            delete(ClaveIdempotencia).where(ClaveIdempotencia.expira_en < datetime.now(timezone.utc))
+        )
+        await db.commit()
+        return result.rowcount
+
+
+def _como_respuesta(fila: ClaveIdempotencia) -> Respuesta:
+    return fila.huella, fila.estado, json.loads(fila.encabezados or "[]"), fila.cuerpo or b""
+
+
+class IdempotencyMiddleware:
+    """Middleware ASGI que hace idempotentes los POST que traen ``Idempotency-Key``.
+
+    Solo aplica a requests autenticados: sin un token valido la clave se
+    rechaza con 400, porque no hay con que separar las claves de cada
+    cliente. Las rutas de ``RUTAS_EXCLUIDAS`` la ignoran.
+
+    La primera respuesta (salvo errores 5xx) se guarda en una LRU en memoria y
+    en la tabla claves_idempotencia; los reintentos con la misma clave la
+    reciben de nuevo sin ejecutar el handler. Los duplicados concurrentes del
+    mismo worker esperan en un lock por clave; los de otros workers esperan a
+    que la fila deje de estar en proceso, hasta ``IDEMPOTENCY_WAIT`` segundos.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._locks: Dict[str, list] = {}
+
+    @asynccontextmanager
+    async def _bloqueo(self, clave: str):
+        entrada = self._locks.setdefault(clave, [asyncio.Lock(), 0])
+        entrada[1] += 1
+        try:
+            async with entrada[0]:
+                yield
+        finally:
+            entrada[1] -= 1
+            if entrada[1] == 0:
+                del self._locks[clave]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None or scope["path"].endswith(RUTAS_EXCLUIDAS):
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            await self._error(send, 400, "Idempotency-Key invalida")
+            return
+        usuario = _usuario(headers)
+        if usuario is None:
+            await self._error(send, 400, "Idempotency-Key requiere un token de acceso valido")
+            return
+
+        # El cuerpo se lee entero para calcular la huella y se le vuelve a entregar a la app
+        partes = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            partes.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        cuerpo = b"".join(partes)
+        entregado = False
+
+        async def receive_replay():
+            nonlocal entregado
+            if not entregado:
+                entregado = True
+                return {"type": "http.request", "body": cuerpo, "more_body": False}
+            return await receive()
+
+        clave = _sha256(usuario, scope["path"].encode(), idempotency_key.encode())
+        huella = _sha256(scope.get("query_string", b""), cuerpo)
+
+        async with self._bloqueo(clave):
+            guardada = respuestas_idempotentes.get(clave)
+            if guardada is None:
+                guardada = await self._reclamar_o_esperar(clave, huella)
+                if guardada is False:
+                    await self._error(send, 409, "Hay una solicitud en proceso con la misma Idempotency-Key")
+                    return
+            if guardada is not None:
+                if guardada[0] != huella:
+                    await self._error(send, 422, "La Idempotency-Key ya se uso con otra solicitud")
+                    return
+                respuestas_idempotentes.set(clave, guardada)
+                await self._repetir(send, guardada)
+                return
+
+            # Primer request con esta clave: ejecutar y capturar la respuesta
+            estado = 500
+            encabezados: List[List[str]] = []
+            cuerpo_respuesta = []
+
+            async def send_wrapper(message):
+                nonlocal estado, encabezados
+                if message["type"] == "http.response.start":
+                    estado = message["status"]
+                    encabezados = [[k.decode("latin-1"), v.decode("latin-1")] for k, v in message["headers"]]
+                elif message["type"] == "http.response.body":
+                    cuerpo_respuesta.append(message.get("body", b""))
+                await send(message)
+
+            try:
+                await self.app(scope, receive_replay, send_wrapper)
+            except BaseException:
+                await _liberar(clave)
+                raise
+            if estado >= 500:
+                await _liberar(clave)
+                return
+            respuesta = (huella, estado, encabezados, b"".join(cuerpo_respuesta))
+            respuestas_idempotentes.set(clave, respuesta)
+            await _guardar(clave, respuesta)
+
+    async def _reclamar_o_esperar(self, clave: str, huella: str):
+        """``None`` si este request reclamo la clave, la respuesta guardada si ya existe,
+        o ``False`` si otro worker la sigue procesando despues de esperar."""
+        fila = await _reclamar(clave, huella)
+        espera, limite = 0.05, asyncio.get_running_loop().time() + IDEMPOTENCY_WAIT
+        # Con otra huella no se espera: el llamador responde 422
+        while fila is not None and fila.estado is None and fila.huella == huella:
+            if asyncio.get_running_loop().time() >= limite:
+                return False
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 1.0)
+            fila = await _buscar(clave)
+            if fila is None:
+                # El request original fallo y libero la clave
+                fila = await _reclamar(clave, huella)
+        return _como_respuesta(fila) if fila is not None else None
+
+    @staticmethod
+    async def _repetir(send, respuesta: Respuesta) -> None:
+        _, estado, encabezados, cuerpo = respuesta
+        raw = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in encabezados]
+        raw.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": estado, "headers": raw})
+        await send({"type": "http.response.body", "body": cuerpo})
+
+    @staticmethod
+    async def _error(send, estado: int, detail: str) -> None:
+        cuerpo = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": estado,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())],
+        })
+        await send({"type": "http.response.body", "body": cuerpo})
@@ -0,0 +1,236 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Umbral de sentencias SQL por request a partir del cual se loguea un warning (posible N+1)
+METRICS_MAX_STATEMENTS = int(os.getenv("METRICS_MAX_STATEMENTS", 20))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...], labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labelnames = labelnames
+        # labels -> [conteo por bucket..., +Inf, suma]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            for labels, series in sorted(self._values.items()):
+                acumulado = 0
+                for bound, count in zip(self.buckets + (float("inf"),), series):
+                    acumulado += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % le)
+                    yield f"{self.name}_bucket{bucket_labels} {acumulado}"
+                yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}"
+                yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {acumulado}"
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latencia de los requests HTTP por ruta.",
+    LATENCY_BUCKETS, ("method", "route"),
+)
+REQUESTS_TOTAL = Counter(
+    "http_requests_total", "Requests HTTP por ruta y codigo de estado.",
+    ("method", "route", "status"),
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements", "Sentencias SQL ejecutadas por request.",
+    STATEMENT_BUCKETS, ("method", "route"),
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds", "Tiempo en la base de datos por request.",
+    LATENCY_BUCKETS, ("method", "route"),
+)
+STATEMENT_LIMIT_EXCEEDED = Counter(
+    "http_request_db_statement_limit_exceeded_total",
+    "Requests que superaron METRICS_MAX_STATEMENTS sentencias SQL.",
+    ("method", "route"),
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obtener una conexion del pool.",
+    LATENCY_BUCKETS,
+)
+POOL_CONNECTION_HOLD = Histogram(
+    "db_pool_connection_hold_seconds", "Tiempo que cada conexion pasa fuera del pool, del checkout al checkin.",
+    LATENCY_BUCKETS,
+)
+
+REGISTRY = [
+    REQUEST_LATENCY, REQUESTS_TOTAL, REQUEST_STATEMENTS, REQUEST_DB_TIME,
+    STATEMENT_LIMIT_EXCEEDED, POOL_CHECKOUT_WAIT, POOL_CONNECTION_HOLD,
+]
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_time")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def render_metrics(extra_gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+    """Devuelve todas las metricas en el formato de texto de Prometheus."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name, (documentation, value) in (extra_gauges or {}).items():
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# El inicio se guarda en el contexto de ejecucion de la sentencia, no en la
+# conexion: si la sentencia falla no queda nada colgado en una conexion del pool
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checkout_at"] = time.perf_counter()
+
+
+def _checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("checkout_at", None)
+    if started is not None:
+        POOL_CONNECTION_HOLD.observe(time.perf_counter() - started)
+
+
+def instrument_engine(engine) -> None:
+    """Registra los hooks que cuentan sentencias y tiempo de DB por request
+    y cuanto tiempo se retiene cada conexion del pool."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "checkout", _checkout)
+    event.listen(engine, "checkin", _checkin)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Pool async que mide cuanto espera cada checkout por una conexion
+    y cuantos checkouts estan esperando en este momento."""
+
+    waiters = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        self.waiters += 1
+        try:
+            return super()._do_get()
+        finally:
+            self.waiters -= 1
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que registra latencia, sentencias SQL y tiempo de DB por ruta."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, path)
+            REQUESTS_TOTAL.inc(method, path, str(status_code))
+            REQUEST_STATEMENTS.observe(stats.statements, method, path)
+            REQUEST_DB_TIME.observe(stats.db_time, method, path)
+            if stats.statements > METRICS_MAX_STATEMENTS:
+                STATEMENT_LIMIT_EXCEEDED.inc(method, path)
+                logger.warning(
+                    "%s %s ejecuto %d sentencias SQL (umbral %d), posible N+1",
+                    method, path, stats.statements, METRICS_MAX_STATEMENTS,
+                )
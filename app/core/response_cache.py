@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Protocol, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+
+from app.core.responses import etag_matches, not_modified
+
+load_dotenv()
+
+# "shm": archivos en memoria compartida (/dev/shm), comun a todos los workers;
+# "memory": LRU por proceso, solo correcta con un unico worker
+LIST_CACHE_BACKEND = os.getenv("LIST_CACHE_BACKEND", "shm")
+LIST_CACHE_MAX_BYTES = int(os.getenv("LIST_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+LIST_CACHE_TTL = float(os.getenv("LIST_CACHE_TTL", 300))
+# Sin /dev/shm (por ejemplo en macOS) se usa el directorio temporal del sistema
+LIST_CACHE_DIR = os.getenv("LIST_CACHE_DIR") or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "proyecto_1-listados"
+)
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[bytes]: ...
+    def set(self, key: str, value: bytes) -> None: ...
+
+
+class MemoryBackend:
+    """LRU en memoria del proceso, acotada por el total de bytes guardados.
+
+    Con varios workers cada uno tiene su copia y sus propias versiones: una
+    escritura en un worker no invalida a los demas hasta que vence el TTL.
+    Por eso solo se usa si se pide explicitamente con LIST_CACHE_BACKEND=memory.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                self.size -= len(self._data.pop(key)[0])
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._data.pop(key, None)
+            if anterior is not None:
+                self.size -= len(anterior[0])
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, (descartado, _) = self._data.popitem(last=False)
+                self.size -= len(descartado)
+
+
+class SharedMemoryBackend:
+    """Un archivo por entrada en un tmpfs (/dev/shm), visible para todos los workers.
+
+    Las escrituras son atomicas (archivo temporal + rename). El LRU es
+    aproximado: cada lectura actualiza el mtime y, cuando lo escrito desde
+    la ultima limpieza supera un 10% del maximo, se borran las entradas con
+    mtime mas viejo hasta quedar por debajo de ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._escrito = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _ruta(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key: str) -> Optional[bytes]:
+        ruta = self._ruta(key)
+        try:
+            if time.time() - os.stat(ruta).st_mtime > self.ttl:
+                return None
+            with open(ruta, "rb") as archivo:
+                value = archivo.read()
+            os.utime(ruta)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        ruta = self._ruta(key)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(value)
+        os.replace(temporal, ruta)
+        with self._lock:
+            self._escrito += len(value)
+            limpiar = self._escrito > self.max_bytes // 10
+            if limpiar:
+                self._escrito = 0
+        if limpiar:
+            self._limpiar()
+
+    def _limpiar(self) -> None:
+        entradas = []
+        for entrada in os.scandir(self.directory):
+            try:
+                stat = entrada.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((stat.st_mtime, stat.st_size, entrada.path))
+        total = sum(tamano for _, tamano, _ in entradas)
+        vencimiento = time.time() - self.ttl
+        for mtime, tamano, ruta in sorted(entradas):
+            if total <= self.max_bytes and mtime >= vencimiento:
+                break
+            try:
+                os.unlink(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
+
+
+class ListCache:
+    """Paginas de listados ya renderizadas, por usuario y recurso.
+
+    Cada (usuario, recurso) tiene una version que los handlers de alta,
+    modificacion y baja cambian con ``bump`` despues del commit; la version
+    forma parte de la clave, asi las paginas viejas dejan de encontrarse y
+    el backend las descarta por LRU o TTL.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    def _clave_version(self, usuario_id: int, recurso: str) -> str:
+        return f"v:{usuario_id}:{recurso}"
+
+    def version(self, usuario_id: int, recurso: str) -> str:
+        clave = self._clave_version(usuario_id, recurso)
+        version = self.backend.get(clave)
+        if version is None:
+            # Version desconocida (nueva o descartada): una nueva no coincide con ninguna pagina guardada
+            version = os.urandom(8).hex().encode()
+            self.backend.set(clave, version)
+        return version.decode()
+
+    def bump(self, usuario_id: int, recurso: str) -> None:
+        self.backend.set(self._clave_version(usuario_id, recurso), os.urandom(8).hex().encode())
+
+    async def response(
+        self, request: Request, usuario_id: int, recurso: str, render: Callable[[], Awaitable[Response]],
+        variante: str = "",
+    ) -> Response:
+        """Devuelve la pagina desde la cache o la genera con ``render`` y la guarda.
+
+        ``variante`` entra en la clave cuando la pagina depende de datos que no
+        son del recurso (por ejemplo la version de las cotizaciones usadas).
+        Responde 304 si ``If-None-Match`` coincide con el ETag (hash del cuerpo).
+        """
+        parametros = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        clave = f"p:{usuario_id}:{recurso}:{self.version(usuario_id, recurso)}:{variante}:{parametros}"
+        guardada = self.backend.get(clave)
+        if guardada is not None:
+            encabezado, _, body = guardada.partition(b"\n")
+            headers: Dict[str, str] = json.loads(encabezado)
+        else:
+            response = await render()
+            if response.status_code != 200:
+                return response
+            body = response.body
+            headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+            headers["etag"] = '"%s"' % hashlib.sha1(body).hexdigest()
+            self.backend.set(clave, json.dumps(headers).encode() + b"\n" + body)
+        if etag_matches(request, headers["etag"]):
+            return not_modified(headers["etag"])
+        return Response(body, headers=headers)
+
+
+if LIST_CACHE_BACKEND == "memory":
+    list_cache = ListCache(MemoryBackend(LIST_CACHE_MAX_BYTES, LIST_CACHE_TTL))
+else:
+    list_cache = ListCache(SharedMemoryBackend(LIST_CACHE_DIR, LIST_CACHE_MAX_BYTES, LIST_CACHE_TTL))
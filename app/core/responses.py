@@ -0,0 +1,52 @@
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from fastapi import Request, Response, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from app.database.database import liberar_conexion_request
+
+
+class FastJSONResponse(ORJSONResponse):
+    """Respuesta JSON con orjson que deja pasar bytes ya serializados."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return super().render(content)
+
+
+class ListSerializer:
+    """Serializa filas del ORM a JSON en una sola pasada por pydantic-core.
+
+    Los handlers que lo usan devuelven la respuesta directamente, asi
+    FastAPI no vuelve a validar contra ``response_model`` ni pasa por
+    ``jsonable_encoder``: cada fila se valida una vez (from_attributes)
+    y se escribe a bytes sin diccionarios intermedios. Antes de serializar
+    termina la transaccion de lectura del request, para no retener la
+    conexion mientras se renderiza.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.adapter = TypeAdapter(List[schema])
+
+    def dump_json(self, rows: Iterable[Any]) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(rows, from_attributes=True))
+
+    async def response(self, rows: Iterable[Any], headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+        await liberar_conexion_request()
+        return FastJSONResponse(self.dump_json(rows), headers=headers)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Indica si ``If-None-Match`` del request incluye ``etag`` (comparacion debil)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
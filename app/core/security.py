@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import os
+
+from dotenv import load_dotenv
+from jose import jwt
+
+load_dotenv()
+
+# JWT configs
+SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")  # Change in production!
+ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    to_encode = data.copy()
+    expire = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    if expires_delta:
+        expire = expires_delta
+    to_encode.update({"exp": datetime.now(timezone.utc) + expire})
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
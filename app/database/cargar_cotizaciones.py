@@ -0,0 +1,69 @@
+import argparse
+import csv
+import logging
+import sys
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.database.database import SessionLocal
+from app.models.models import Cotizacion
+from app.services.cotizaciones import SERIES
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Filas por INSERT (3 parametros por fila, lejos del limite de parametros de PostgreSQL)
+LOTE = 5000
+
+def leer_csv(ruta: str, serie_por_defecto: str = None) -> list:
+    """Lee un CSV con columnas ``fecha,valor`` y opcionalmente ``serie``."""
+    filas = []
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        for numero, registro in enumerate(csv.DictReader(archivo), start=2):
+            serie = (registro.get("serie") or serie_por_defecto or "").strip().lower()
+            if serie not in SERIES:
+                raise ValueError(f"Linea {numero}: serie desconocida '{serie}' (usar {', '.join(SERIES)})")
+            filas.append({
+                "serie": serie,
+                "fecha": date.fromisoformat(registro["fecha"].strip()),
+                "valor": Decimal(registro["valor"].strip().replace(",", ".")),
+            })
+    return filas
+
+def cargar_cotizaciones(db, filas: list) -> None:
+    """Inserta o actualiza las cotizaciones (clave serie + fecha)."""
+    if not filas:
+        return
+    insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+    try:
+        for inicio in range(0, len(filas), LOTE):
+            stmt = insert(Cotizacion).values(filas[inicio:inicio + LOTE])
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[Cotizacion.serie, Cotizacion.fecha],
+                set_={"valor": stmt.excluded.valor, "updated_at": func.now()},
+            ))
+        db.commit()
+        logger.info(f"Cargadas {len(filas)} cotizaciones.")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al cargar cotizaciones: {e}")
+        raise
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga cotizaciones ARS/USD desde un CSV.")
+    parser.add_argument("archivo", help="CSV con columnas fecha,valor[,serie]")
+    parser.add_argument("--serie", choices=SERIES, help="Serie a usar si el CSV no tiene columna serie")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cargar_cotizaciones(db, leer_csv(args.archivo, args.serie))
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"No se pudo leer {args.archivo}: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
@@ -0,0 +1,65 @@
+import argparse
+import csv
+import logging
+import sys
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.database.database import SessionLocal
+from app.models.models import IndicePrecios
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def leer_csv(ruta: str) -> list:
+    """Lee un CSV con columnas ``mes,valor``; ``mes`` puede ser ``YYYY-MM`` o una fecha ISO."""
+    filas = []
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        for numero, registro in enumerate(csv.DictReader(archivo), start=2):
+            texto = registro["mes"].strip()
+            try:
+                mes = date.fromisoformat(texto if len(texto) > 7 else f"{texto}-01").replace(day=1)
+            except ValueError:
+                raise ValueError(f"Linea {numero}: mes invalido '{texto}' (usar YYYY-MM)")
+            valor = Decimal(registro["valor"].strip().replace(",", "."))
+            if valor <= 0:
+                raise ValueError(f"Linea {numero}: el indice debe ser positivo")
+            filas.append({"mes": mes, "valor": valor})
+    return filas
+
+def cargar_ipc(db, filas: list) -> None:
+    """Inserta o actualiza los valores del indice (clave mes)."""
+    if not filas:
+        return
+    insert = sqlite.insert if db.get_bind().dialect.name == "sqlite" else postgresql.insert
+    try:
+        # Una fila por mes: unas pocas centenas, entra en un solo INSERT
+        stmt = insert(IndicePrecios).values(filas)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[IndicePrecios.mes],
+            set_={"valor": stmt.excluded.valor, "updated_at": func.now()},
+        ))
+        db.commit()
+        logger.info(f"Cargados {len(filas)} meses del indice de precios.")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al cargar el indice de precios: {e}")
+        raise
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga el indice de precios al consumidor (IPC) desde un CSV.")
+    parser.add_argument("archivo", help="CSV con columnas mes,valor")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cargar_ipc(db, leer_csv(args.archivo))
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"No se pudo leer {args.archivo}: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
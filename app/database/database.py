@@ -1,16 +1,206 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
+from contextvars import ContextVar
+from typing import Optional
+import asyncio
 import os
 
+from app.core.metrics import TimedAsyncQueuePool, instrument_engine
+
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Drivers async equivalentes a los sincronos de DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Deriva la URL async (asyncpg/aiosqlite) a partir de la URL sincrona."""
+    url = make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or get_async_database_url(SQLALCHEMY_DATABASE_URL)
+
+# Replica de solo lectura opcional: si esta configurada, los GET leen de ella
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+
+# Pool de conexiones: tamano, desborde, espera maxima de un checkout (segundos),
+# reciclado de conexiones viejas (segundos) y ping antes de reutilizar una
+# conexion, para descartar las que quedaron muertas despues de un failover
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Conexiones que se abren al arrancar, para que los primeros requests no paguen el connect
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", 0))
+
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+def opciones_pool(url: str, poolclass=None) -> dict:
+    """Opciones de pool para ``url`` segun el pool que elige su dialecto.
+
+    Las de QueuePool (tamano, desborde, espera) y ``poolclass`` solo se pasan
+    si el dialecto usa un pool con cola; SQLite en memoria usa una unica
+    conexion compartida (SingletonThreadPool/StaticPool) que no las acepta.
+    """
+    url = make_url(url)
+    if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        return {**POOL_OPTIONS, "poolclass": poolclass} if poolclass else dict(POOL_OPTIONS)
+    return {"pool_recycle": DB_POOL_RECYCLE, "pool_pre_ping": DB_POOL_PRE_PING}
+
+# Engine sincrono: lo usan scripts como init_db.py
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **opciones_pool(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine async: lo usan los endpoints de la API
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL, **opciones_pool(ASYNC_SQLALCHEMY_DATABASE_URL, TimedAsyncQueuePool)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Engine de la replica, con su propio pool y la misma configuracion
+replica_engine = (
+    create_async_engine(
+        get_async_database_url(REPLICA_DATABASE_URL),
+        **opciones_pool(get_async_database_url(REPLICA_DATABASE_URL), TimedAsyncQueuePool),
+    )
+    if REPLICA_DATABASE_URL
+    else None
+)
+
+class RoutingSession(Session):
+    """Sesion que lee de la replica cuando se crea con ``info={"replica": True}``.
+
+    Solo las lecturas van a la replica: los flush, las sentencias que no son
+    SELECT y los SELECT ... FOR UPDATE usan el primario, y despues de la
+    primera escritura toda la sesion sigue en el primario para que el
+    request lea lo que acaba de escribir. Sin replica configurada todo va
+    al primario.
+
+    ``_escritura_pendiente`` indica si la transaccion en curso escribio;
+    se limpia cuando la transaccion termina (commit, rollback o close).
+    """
+
+    _escritura = False
+    _escritura_pendiente = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self._flushing
+            or not getattr(clause, "is_select", True)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self._escritura = self._escritura_pendiente = True
+        elif replica_engine is not None and self.info.get("replica") and not self._escritura:
+            return replica_engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _fin_de_transaccion(session, transaction):
+    if transaction.parent is None:
+        session._escritura_pendiente = False
+
+# Sesiones de los endpoints (get_async_db): una transaccion por request, que
+# lee de la replica si se pide
+RequestSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, sync_session_class=RoutingSession,
+    autoflush=False, expire_on_commit=False,
+)
+
+# Sesion del request en curso; la fija get_async_db
+sesion_request: ContextVar[Optional[AsyncSession]] = ContextVar("sesion_request", default=None)
+
+async def liberar_conexion_request() -> None:
+    """Termina la transaccion de lectura del request y devuelve su conexion al pool.
+
+    Se llama despues de la ultima consulta del handler y antes de serializar
+    la respuesta, que con FastAPI ocurre antes de cerrar la sesion. Con
+    ``expire_on_commit=False`` los objetos cargados siguen disponibles. Una
+    transaccion que escribio sin commit no se toca: la descarta el cierre
+    de la sesion, como siempre.
+    """
+    db = sesion_request.get()
+    if db is not None and db.in_transaction() and not db.sync_session._escritura_pendiente:
+        await db.commit()
+
+async def precalentar_pool(cantidad: int = DB_POOL_PREWARM) -> int:
+    """Abre ``cantidad`` conexiones a la vez (hasta el tamano del pool) y las devuelve al pool."""
+    cantidad = min(cantidad, DB_POOL_SIZE)
+    if cantidad <= 0:
+        return 0
+    conexiones = await asyncio.gather(*(async_engine.connect() for _ in range(cantidad)))
+    await asyncio.gather(*(conexion.close() for conexion in conexiones))
+    return cantidad
+
+def estado_pool(motor=async_engine) -> dict:
+    """Conexiones del pool async: en uso, libres, de desborde y checkouts esperando."""
+    pool = motor.pool
+    if not isinstance(pool, QueuePool):
+        # SQLite en memoria: una sola conexion compartida, sin cola ni desborde
+        return {"size": 1, "checked_out": 0, "idle": 1, "overflow": 0, "max_overflow": 0, "waiters": 0}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "waiters": pool.waiters,
+    }
+
+# Sentencias y tiempo de DB por request para /metrics
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine.sync_engine)
+
+# SQLite no aplica las foreign keys por defecto; los endpoints dependen de
+# ellas para rechazar borrados (por ejemplo una categoria con transacciones)
+def _activar_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+for _engine in (engine, async_engine.sync_engine):
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _activar_foreign_keys)
+
+# Cada transaccion en la replica se declara de solo lectura: una escritura
+# que llegue ahi por error falla en vez de divergir del primario
+def _transaccion_solo_lectura(conn):
+    conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+def _conexion_solo_lectura(dbapi_connection, connection_record):
+    # SQLite (replica de prueba) no tiene SET TRANSACTION: se usa query_only
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+if replica_engine is not None:
+    if replica_engine.dialect.name == "sqlite":
+        event.listen(replica_engine.sync_engine, "connect", _activar_foreign_keys)
+        event.listen(replica_engine.sync_engine, "connect", _conexion_solo_lectura)
+    else:
+        event.listen(replica_engine.sync_engine, "begin", _transaccion_solo_lectura)
+
 Base = declarative_base()
 
 #Dependency
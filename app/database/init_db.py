@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine, inspect
+from alembic import command
+from alembic.config import Config
 from app.database.database import Base, engine
 from app.models.models import Usuario, Categoria, Transaccion, TarjetaCredito, OtroCredito, Alquiler, Servicio
 from app.models.models import TipoCategoria, TipoTransaccion, RolUsuario
@@ -15,6 +17,9 @@ def init_db():
         Base.metadata.create_all(bind=engine)
         logger.info("Se han creado todas las tablas en la base de datos.")
         
+        # Marcar la base como migrada hasta la ultima revision de Alembic
+        command.stamp(Config("alembic.ini"), "head")
+        
         # Verificar qué tablas se crearon
         inspector = inspect(engine)
         tables = inspector.get_table_names()
@@ -0,0 +1,68 @@
+import argparse
+import logging
+import sys
+
+from sqlalchemy import delete, insert
+
+from app.database.database import SessionLocal
+from app.models.models import ResumenMensual
+from app.services.resumen_mensual import calcular_resumen, leer_resumen
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def verificar_drift(db) -> int:
+    """Compara resumen_mensual con las transacciones crudas y loguea las diferencias."""
+    esperado = calcular_resumen(db)
+    actual = leer_resumen(db)
+    diferencias = 0
+    for clave in esperado.keys() | actual.keys():
+        total_esperado, cantidad_esperada = esperado.get(clave, (0, 0))
+        total_actual, cantidad_actual = actual.get(clave, (0, 0))
+        # Los importes son centavos enteros: la comparacion es exacta
+        if cantidad_esperada != cantidad_actual or total_esperado != total_actual:
+            diferencias += 1
+            logger.warning(
+                f"Drift en {clave}: esperado total={total_esperado} cantidad={cantidad_esperada}, "
+                f"actual total={total_actual} cantidad={cantidad_actual}"
+            )
+    logger.info(f"Verificadas {len(esperado)} filas de resumen, {diferencias} con diferencias.")
+    return diferencias
+
+def reconstruir_resumen(db) -> None:
+    """Recalcula resumen_mensual desde cero a partir de las transacciones."""
+    try:
+        esperado = calcular_resumen(db)
+        db.execute(delete(ResumenMensual))
+        if esperado:
+            db.execute(insert(ResumenMensual), [
+                {
+                    "usuario_id": usuario_id,
+                    "mes": mes,
+                    "categoria_id": categoria_id,
+                    "tipo": tipo,
+                    "total": total,
+                    "cantidad": cantidad,
+                }
+                for (usuario_id, mes, categoria_id, tipo), (total, cantidad) in esperado.items()
+            ])
+        db.commit()
+        logger.info(f"Resumen mensual reconstruido: {len(esperado)} filas.")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al reconstruir el resumen mensual: {e}")
+        raise
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruye y verifica la tabla resumen_mensual.")
+    parser.add_argument("--solo-verificar", action="store_true", help="No reconstruir, solo reportar el drift")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.solo_verificar:
+            reconstruir_resumen(db)
+        sys.exit(1 if verificar_drift(db) else 0)
+    finally:
+        db.close()
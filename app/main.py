@@ -1,5 +1,14 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+
+from app.core.idempotency import IdempotencyMiddleware, purgar_vencidas
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.password_pool import password_pool
+from app.database.database import DB_POOL_TIMEOUT, async_engine, estado_pool, precalentar_pool, replica_engine
+from app.services.catalogo_categorias import catalogo_categorias
 
 app = FastAPI(
     title="FastAPI app",
@@ -7,6 +16,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Reintentos de POST con Idempotency-Key: devuelve la respuesta guardada.
+# Va dentro de CORS para que las respuestas repetidas lleven los headers del origen actual
+app.add_middleware(IdempotencyMiddleware)
+
 # Configuracion de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -14,8 +27,80 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed"],
 )
 
+# Latencia, sentencias SQL y tiempo de DB por ruta
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
 async def root():
-    return {"message": "Bienvenido a la API"}
\ No newline at end of file
+    return {"message": "Bienvenido a la API"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    pool_stats = password_pool.stats()
+    db_pool = estado_pool()
+    return PlainTextResponse(
+        render_metrics({
+            "password_hash_pool_queue_depth": ("Tareas de hashing esperando un worker.", pool_stats["queue_depth"]),
+            "password_hash_pool_in_flight": ("Tareas de hashing en ejecucion.", pool_stats["in_flight"]),
+            "password_hash_pool_rejected": ("Tareas de hashing rechazadas por cola llena.", pool_stats["rejected"]),
+            "db_pool_checked_out": ("Conexiones del pool en uso.", db_pool["checked_out"]),
+            "db_pool_idle": ("Conexiones abiertas libres en el pool.", db_pool["idle"]),
+            "db_pool_overflow": ("Conexiones abiertas por encima de DB_POOL_SIZE.", db_pool["overflow"]),
+            "db_pool_waiters": ("Checkouts esperando una conexion.", db_pool["waiters"]),
+        }),
+        media_type="text/plain; version=0.0.4",
+    )
+
+@app.get("/metrics/password-pool")
+async def password_pool_metrics():
+    return password_pool.stats()
+
+@app.get("/health/ready")
+async def health_ready():
+    # Ready when the database (and the replica, if any) answers; the pool numbers help spot exhaustion
+    motores = {"pool": async_engine}
+    if replica_engine is not None:
+        motores["replica_pool"] = replica_engine
+    pools = {nombre: estado_pool(motor) for nombre, motor in motores.items()}
+
+    async def ping(motor):
+        async with motor.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(ping(motor) for motor in motores.values())), timeout=DB_POOL_TIMEOUT
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "detail": str(e), **pools},
+        )
+    return {"status": "ok", **pools}
+
+@app.on_event("startup")
+async def startup_pool():
+    # Open DB_POOL_PREWARM connections before serving the first request
+    await precalentar_pool()
+
+@app.on_event("startup")
+async def startup_catalogo_categorias():
+    # Catalogo de categorias en memoria y aviso de cambios entre workers
+    await catalogo_categorias.recargar()
+    await catalogo_categorias.escuchar()
+
+@app.on_event("startup")
+async def startup_idempotency():
+    # Las claves vencidas se reemplazan al reutilizarse; aca se limpia el resto
+    await purgar_vencidas()
+
+@app.on_event("shutdown")
+async def shutdown_password_pool():
+    password_pool.shutdown()
+
+@app.on_event("shutdown")
+async def shutdown_catalogo_categorias():
+    await catalogo_categorias.detener()
\ No newline at end of file
@@ -1,9 +1,37 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Boolean, DateTime, Text, Enum
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import Column, Integer, BigInteger, String, Date, ForeignKey, Boolean, DateTime, Text, Enum, Index, Numeric, LargeBinary
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
 from app.database.database import Base
 
+CENTAVO = Decimal("0.01")
+
+def a_centavos(valor) -> int:
+    """Convierte un importe (Decimal, int, float o str) a centavos enteros."""
+    return int((Decimal(str(valor)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+class Centavos(TypeDecorator):
+    """Importe de dinero guardado como BIGINT de centavos.
+
+    Desde Python se lee y escribe como Decimal con dos decimales. En la base
+    las sumas y restas se hacen sobre enteros: exactas y mas baratas que en
+    punto flotante.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return a_centavos(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return (Decimal(int(value)) / 100).quantize(CENTAVO)
+
 class TipoCategoria(str, enum.Enum):
     INGRESO = "ingreso"
     EGRESO = "egreso"
@@ -52,7 +80,7 @@ class Transaccion(Base):
     tipo = Column(String(20), nullable=False)
     categoria_id = Column(Integer, ForeignKey("categorias.id"), nullable=False)
     detalle = Column(Text)
-    monto = Column(Float, nullable=False)
+    monto = Column(Centavos, nullable=False)
     medio_de_pago = Column(String(100))
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     
@@ -63,6 +91,14 @@ class Transaccion(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination: WHERE usuario_id = ? AND (fecha, id) < (?, ?) ORDER BY fecha DESC, id DESC
+        Index("ix_transacciones_usuario_fecha_id", usuario_id, fecha.desc(), id.desc()),
+        # Listado filtrado por categoria y chequeo de uso en delete_categoria
+        Index("ix_transacciones_usuario_categoria_fecha_id", usuario_id, categoria_id, fecha.desc(), id.desc()),
+        Index("ix_transacciones_categoria_id", categoria_id),
+    )
+
 class TarjetaCredito(Base):
     __tablename__ = "tarjetas_credito"
 
@@ -70,8 +106,8 @@ class TarjetaCredito(Base):
     cuotas = Column(Integer, nullable=False)
     vencimiento = Column(Date, nullable=False)
     detalle = Column(Text)
-    deuda = Column(Float, nullable=False)
-    pago = Column(Float, nullable=False)
+    deuda = Column(Centavos, nullable=False)
+    pago = Column(Centavos, nullable=False)
     medio_de_pago = Column(String(100))
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     
@@ -81,6 +117,15 @@ class TarjetaCredito(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_tarjetas_credito_usuario_vencimiento", usuario_id, vencimiento),
+        # Solo obligaciones impagas
+        Index(
+            "ix_tarjetas_credito_usuario_vencimiento_impagas", usuario_id, vencimiento,
+            postgresql_where=deuda > pago, sqlite_where=deuda > pago,
+        ),
+    )
+
 class OtroCredito(Base):
     __tablename__ = "otros_creditos"
 
@@ -88,8 +133,8 @@ class OtroCredito(Base):
     cuotas = Column(Integer, nullable=False)
     vencimiento = Column(Date, nullable=False)
     detalle = Column(Text)
-    deuda = Column(Float, nullable=False)
-    pago = Column(Float, nullable=False)
+    deuda = Column(Centavos, nullable=False)
+    pago = Column(Centavos, nullable=False)
     medio_de_pago = Column(String(100))
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     
@@ -99,6 +144,15 @@ class OtroCredito(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_otros_creditos_usuario_vencimiento", usuario_id, vencimiento),
+        # Solo obligaciones impagas
+        Index(
+            "ix_otros_creditos_usuario_vencimiento_impagas", usuario_id, vencimiento,
+            postgresql_where=deuda > pago, sqlite_where=deuda > pago,
+        ),
+    )
+
 class Alquiler(Base):
     __tablename__ = "alquileres"
 
@@ -106,11 +160,43 @@ class Alquiler(Base):
     cuota = Column(Integer, nullable=False)
     vencimiento = Column(Date, nullable=False)
     inquilino = Column(String(255), nullable=False)
-    deuda = Column(Float, nullable=False)
-    pagado = Column(Float, nullable=False)
+    deuda = Column(Centavos, nullable=False)
+    pagado = Column(Centavos, nullable=False)
     propiedad = Column(Text)
     recibo = Column(String(100))
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    # Cuotas generadas desde un contrato indexado (NULL si se cargaron a mano)
+    contrato_id = Column(Integer, ForeignKey("contratos_alquiler.id", ondelete="SET NULL"), index=True)
+    
+    # Relaciones
+    usuario = relationship("Usuario")
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_alquileres_usuario_vencimiento_inquilino", usuario_id, vencimiento, inquilino),
+        # Solo alquileres impagos
+        Index(
+            "ix_alquileres_usuario_vencimiento_impagos", usuario_id, vencimiento,
+            postgresql_where=deuda > pagado, sqlite_where=deuda > pagado,
+        ),
+    )
+
+class ContratoAlquiler(Base):
+    """Contrato de alquiler indexado: genera las cuotas de ``alquileres`` con sus ajustes."""
+    __tablename__ = "contratos_alquiler"
+
+    id = Column(Integer, primary_key=True, index=True)
+    propiedad = Column(Text, nullable=False)
+    inquilino = Column(String(255), nullable=False)
+    inicio = Column(Date, nullable=False)  # vencimiento de la primera cuota
+    meses = Column(Integer, nullable=False)  # duracion del contrato
+    monto_inicial = Column(Centavos, nullable=False)
+    indice = Column(String(10), nullable=False, default="ipc")  # "ipc" o "fijo"
+    periodo_ajuste = Column(Integer, nullable=False)  # meses entre ajustes
+    porcentaje_ajuste = Column(Numeric(7, 4))  # solo para indice "fijo"
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     
     # Relaciones
     usuario = relationship("Usuario")
@@ -118,6 +204,10 @@ class Alquiler(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_contratos_alquiler_usuario_propiedad", usuario_id, propiedad),
+    )
+
 class Servicio(Base):
     __tablename__ = "servicios"
 
@@ -126,8 +216,8 @@ class Servicio(Base):
     servicio = Column(String(100), nullable=False)
     detalle = Column(Text)
     cuenta = Column(String(100))
-    monto_ars = Column(Float, default=0)
-    monto_usd = Column(Float, default=0)
+    monto_ars = Column(Centavos, default=0)
+    monto_usd = Column(Centavos, default=0)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
     
     # Relaciones
@@ -135,3 +225,63 @@ class Servicio(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_servicios_usuario_vencimiento_servicio", usuario_id, vencimiento, servicio),
+    )
+
+class ResumenMensual(Base):
+    """Totales de transacciones por usuario, mes, categoria y tipo.
+
+    Se mantiene de forma incremental desde los endpoints de transacciones
+    y se puede recalcular con ``python -m app.database.rebuild_resumen``.
+    """
+    __tablename__ = "resumen_mensual"
+
+    usuario_id = Column(Integer, ForeignKey("usuarios.id"), primary_key=True)
+    mes = Column(Date, primary_key=True)
+    categoria_id = Column(Integer, ForeignKey("categorias.id"), primary_key=True)
+    tipo = Column(String(20), primary_key=True)
+    total = Column(Centavos, nullable=False, default=0)
+    cantidad = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class Cotizacion(Base):
+    """Tipo de cambio (pesos por dolar) de una serie en una fecha.
+
+    Se carga desde CSV con ``python -m app.database.cargar_cotizaciones``.
+    """
+    __tablename__ = "cotizaciones"
+
+    serie = Column(String(20), primary_key=True)  # oficial, mep, blue
+    fecha = Column(Date, primary_key=True)
+    valor = Column(Numeric(14, 4), nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class IndicePrecios(Base):
+    """Indice de precios al consumidor (IPC) mensual, para expresar importes en moneda constante.
+
+    Se carga desde CSV con ``python -m app.database.cargar_ipc``.
+    """
+    __tablename__ = "indice_precios"
+
+    mes = Column(Date, primary_key=True)  # primer dia del mes
+    valor = Column(Numeric(14, 4), nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ClaveIdempotencia(Base):
+    """Respuesta guardada de un POST con ``Idempotency-Key``, compartida entre workers.
+
+    Mientras el primer request esta en proceso ``estado`` es NULL.
+    """
+    __tablename__ = "claves_idempotencia"
+
+    clave = Column(String(64), primary_key=True)  # sha256 de usuario + ruta + Idempotency-Key
+    huella = Column(String(64), nullable=False)  # sha256 del query string y el cuerpo
+    estado = Column(Integer)
+    encabezados = Column(Text)  # JSON
+    cuerpo = Column(LargeBinary)
+    expira_en = Column(DateTime(timezone=True), nullable=False, index=True)
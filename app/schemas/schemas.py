@@ -1,8 +1,16 @@
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, PlainSerializer, validator
 from datetime import datetime, date
-from typing import Optional, List
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Annotated, Optional, List
 from enum import Enum
 
+# Importes de dinero: Decimal redondeado al centavo, en JSON se escriben como numero
+Dinero = Annotated[
+    Decimal,
+    AfterValidator(lambda valor: valor.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
+
 # Enums
 class TipoCategoria(str, Enum):
     INGRESO = "ingreso"
@@ -64,7 +72,7 @@ class TransaccionBase(BaseModel):
     tipo: TipoTransaccion
     categoria_id: int
     detalle: Optional[str] = None
-    monto: float
+    monto: Dinero
     medio_de_pago: Optional[str] = None
     usuario_id: int
 
@@ -76,7 +84,7 @@ class TransaccionUpdate(BaseModel):
     tipo: Optional[TipoTransaccion] = None
     categoria_id: Optional[int] = None
     detalle: Optional[str] = None
-    monto: Optional[float] = None
+    monto: Optional[Dinero] = None
     medio_de_pago: Optional[str] = None
 
 class Transaccion(TransaccionBase):
@@ -87,13 +95,31 @@ class Transaccion(TransaccionBase):
     class Config:
         from_attributes = True
 
+class TransaccionBulkError(BaseModel):
+    indice: int
+    detalle: str
+
+class TransaccionBulkResultado(BaseModel):
+    insertadas: int
+    errores: List[TransaccionBulkError] = []
+
+class ResumenMensual(BaseModel):
+    mes: date
+    categoria_id: int
+    tipo: TipoTransaccion
+    total: Dinero
+    cantidad: int
+
+    class Config:
+        from_attributes = True
+
 # TarjetaCredito schemas
 class TarjetaCreditoBase(BaseModel):
     cuotas: int
     vencimiento: date
     detalle: Optional[str] = None
-    deuda: float
-    pago: float
+    deuda: Dinero
+    pago: Dinero
     medio_de_pago: Optional[str] = None
     usuario_id: int
 
@@ -104,8 +130,8 @@ class TarjetaCreditoUpdate(BaseModel):
     cuotas: Optional[int] = None
     vencimiento: Optional[date] = None
     detalle: Optional[str] = None
-    deuda: Optional[float] = None
-    pago: Optional[float] = None
+    deuda: Optional[Dinero] = None
+    pago: Optional[Dinero] = None
     medio_de_pago: Optional[str] = None
 
 class TarjetaCredito(TarjetaCreditoBase):
@@ -121,8 +147,8 @@ class OtroCreditoBase(BaseModel):
     cuotas: int
     vencimiento: date
     detalle: Optional[str] = None
-    deuda: float
-    pago: float
+    deuda: Dinero
+    pago: Dinero
     medio_de_pago: Optional[str] = None
     usuario_id: int
 
@@ -133,8 +159,8 @@ class OtroCreditoUpdate(BaseModel):
     cuotas: Optional[int] = None
     vencimiento: Optional[date] = None
     detalle: Optional[str] = None
-    deuda: Optional[float] = None
-    pago: Optional[float] = None
+    deuda: Optional[Dinero] = None
+    pago: Optional[Dinero] = None
     medio_de_pago: Optional[str] = None
 
 class OtroCredito(OtroCreditoBase):
@@ -150,8 +176,8 @@ class AlquilerBase(BaseModel):
     cuota: int
     vencimiento: date
     inquilino: str
-    deuda: float
-    pagado: float
+    deuda: Dinero
+    pagado: Dinero
     propiedad: Optional[str] = None
     recibo: Optional[str] = None
     usuario_id: int
@@ -163,12 +189,36 @@ class AlquilerUpdate(BaseModel):
     cuota: Optional[int] = None
     vencimiento: Optional[date] = None
     inquilino: Optional[str] = None
-    deuda: Optional[float] = None
-    pagado: Optional[float] = None
+    deuda: Optional[Dinero] = None
+    pagado: Optional[Dinero] = None
     propiedad: Optional[str] = None
     recibo: Optional[str] = None
 
 class Alquiler(AlquilerBase):
+    id: int
+    contrato_id: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Contratos de alquiler indexados
+class ContratoAlquilerBase(BaseModel):
+    propiedad: str
+    inquilino: str
+    inicio: date
+    meses: int = Field(gt=0, le=240)
+    monto_inicial: Dinero = Field(gt=0)
+    indice: str = Field("ipc", pattern="^(ipc|fijo)$")
+    periodo_ajuste: int = Field(gt=0, le=120)
+    porcentaje_ajuste: Optional[Decimal] = None
+    usuario_id: int
+
+class ContratoAlquilerCreate(ContratoAlquilerBase):
+    pass
+
+class ContratoAlquiler(ContratoAlquilerBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -176,14 +226,28 @@ class Alquiler(AlquilerBase):
     class Config:
         from_attributes = True
 
+class GeneracionCuotas(BaseModel):
+    contratos: int
+    cuotas: int
+
+# Rent roll: situacion de cada propiedad
+class CarteraPropiedad(BaseModel):
+    propiedad: Optional[str] = None
+    inquilinos: int
+    alquiler_mes: Dinero
+    cobrado: Dinero
+    deuda_vencida: Dinero
+    cuotas_vencidas: int
+    proximo_vencimiento: Optional[date] = None
+
 # Servicio schemas
 class ServicioBase(BaseModel):
     vencimiento: date
     servicio: str
     detalle: Optional[str] = None
     cuenta: Optional[str] = None
-    monto_ars: float = 0
-    monto_usd: float = 0
+    monto_ars: Dinero = Decimal(0)
+    monto_usd: Dinero = Decimal(0)
     usuario_id: int
 
 class ServicioCreate(ServicioBase):
@@ -194,8 +258,8 @@ class ServicioUpdate(BaseModel):
     servicio: Optional[str] = None
     detalle: Optional[str] = None
     cuenta: Optional[str] = None
-    monto_ars: Optional[float] = None
-    monto_usd: Optional[float] = None
+    monto_ars: Optional[Dinero] = None
+    monto_usd: Optional[Dinero] = None
 
 class Servicio(ServicioBase):
     id: int
@@ -205,6 +269,103 @@ class Servicio(ServicioBase):
     class Config:
         from_attributes = True
 
+# Cronograma de cuotas de tarjetas y otros creditos
+class CuotaCronograma(BaseModel):
+    credito_id: int
+    numero: int
+    vencimiento: date
+    monto: Dinero
+    pagado_acumulado: Dinero
+    restante: Dinero
+
+class CronogramaMensual(BaseModel):
+    mes: date
+    monto: Dinero
+    cuotas: int
+    restante: Dinero
+
+# Proyeccion de flujo de fondos por mes
+class ProyeccionMensual(BaseModel):
+    mes: date
+    ingresos: Dinero
+    egresos: Dinero
+    neto: Dinero
+    saldo_acumulado: Dinero
+    transacciones_ingreso: Dinero
+    transacciones_egreso: Dinero
+    cuotas_tarjetas: Dinero
+    cuotas_creditos: Dinero
+    alquileres: Dinero
+    servicios: Dinero
+
+# Vencimientos: tarjetas, otros creditos, alquileres y servicios en una sola lista
+class Vencimiento(BaseModel):
+    origen: str
+    id: int
+    vencimiento: date
+    descripcion: Optional[str] = None
+    monto: Dinero
+    monto_usd: Dinero = Decimal(0)
+
+# Dashboard: totales, ultimas transacciones y proximos vencimientos en una sola respuesta
+class TotalesDashboard(BaseModel):
+    mes: date
+    ingresos_mes: Dinero
+    egresos_mes: Dinero
+    neto_mes: Dinero
+    deuda_tarjetas: Dinero
+    deuda_otros_creditos: Dinero
+    alquileres_por_cobrar: Dinero
+    servicios_mes_ars: Dinero
+    servicios_mes_usd: Dinero
+    # ?ajuste=ipc
+    ajuste: Optional[str] = None
+    base: Optional[str] = None
+    coeficiente: Optional[float] = None
+    ingresos_mes_real: Optional[Dinero] = None
+    egresos_mes_real: Optional[Dinero] = None
+    neto_mes_real: Optional[Dinero] = None
+    servicios_mes_ars_real: Optional[Dinero] = None
+
+class Dashboard(BaseModel):
+    usuario: Usuario
+    totales: TotalesDashboard
+    ultimas_transacciones: List[Transaccion]
+    proximos_vencimientos: List[Vencimiento]
+
+# Importes normalizados a una sola moneda con la tabla de cotizaciones
+class ServicioNormalizado(Servicio):
+    # ?moneda=
+    moneda: Optional[str] = None
+    cotizacion: Optional[float] = None
+    monto_total: Optional[Dinero] = None
+    # ?ajuste=ipc
+    ajuste: Optional[str] = None
+    base: Optional[str] = None
+    coeficiente: Optional[float] = None
+    monto_ars_real: Optional[Dinero] = None
+
+class ProyeccionMensualNormalizada(ProyeccionMensual):
+    # ?ajuste=ipc
+    ajuste: Optional[str] = None
+    base: Optional[str] = None
+    coeficiente: Optional[float] = None
+    ingresos_real: Optional[Dinero] = None
+    egresos_real: Optional[Dinero] = None
+    neto_real: Optional[Dinero] = None
+    saldo_acumulado_real: Optional[Dinero] = None
+
+class ResumenMensualNormalizado(ResumenMensual):
+    # ?moneda=
+    moneda: Optional[str] = None
+    cotizacion: Optional[float] = None
+    total_convertido: Optional[Dinero] = None
+    # ?ajuste=ipc
+    ajuste: Optional[str] = None
+    base: Optional[str] = None
+    coeficiente: Optional[float] = None
+    total_real: Optional[Dinero] = None
+
 # Token schemas para autenticación
 class Token(BaseModel):
     access_token: str
@@ -213,3 +374,4 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[int] = None
+    rol: Optional[RolUsuario] = None
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+from sqlalchemy import select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import ASYNC_SQLALCHEMY_DATABASE_URL, AsyncSessionLocal, async_engine
+from app.models.models import Categoria
+from app.schemas.schemas import Categoria as CategoriaSchema
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Canal de LISTEN/NOTIFY por el que los workers se avisan cambios en categorias
+CANAL_CATEGORIAS = "categorias_cambiadas"
+
+# Recarga de seguridad: acota la desactualizacion si se pierde una notificacion
+# o si la base no soporta LISTEN/NOTIFY (por ejemplo SQLite en desarrollo)
+CATEGORIAS_CACHE_TTL = float(os.getenv("CATEGORIAS_CACHE_TTL", 300))
+
+# Cada cuanto se verifica que la conexion de LISTEN siga viva (segundos)
+CATEGORIAS_LISTEN_PING = float(os.getenv("CATEGORIAS_LISTEN_PING", 30))
+# Espera maxima entre reintentos de reconexion del LISTEN (segundos)
+CATEGORIAS_LISTEN_BACKOFF_MAX = 30.0
+
+_adapter = TypeAdapter(List[CategoriaSchema])
+
+
+class CatalogoCategorias:
+    """Copia en memoria de la tabla categorias, compartida por todo el proceso.
+
+    Se carga al arrancar y se recarga completa despues de cada escritura en
+    ``categorias.py``. Los demas workers se enteran por ``NOTIFY``, que se
+    emite dentro de la misma transaccion de la escritura y por lo tanto solo
+    llega si esta se confirma.
+    """
+
+    def __init__(self, ttl: float = CATEGORIAS_CACHE_TTL):
+        self.ttl = ttl
+        self._por_id: Dict[int, CategoriaSchema] = {}
+        self._json = b"[]"
+        self.etag = '"vacio"'
+        self._cargado_en: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._escucha: Optional[asyncio.Task] = None
+
+    def _vencido(self) -> bool:
+        return self._cargado_en is None or time.monotonic() - self._cargado_en > self.ttl
+
+    async def recargar(self, solo_si_vencido: bool = False) -> None:
+        async with self._lock:
+            if solo_si_vencido and not self._vencido():
+                return
+            async with AsyncSessionLocal() as db:
+                result = await db.scalars(select(Categoria).order_by(Categoria.id))
+                categorias = _adapter.validate_python(result.all(), from_attributes=True)
+            self._por_id = {categoria.id: categoria for categoria in categorias}
+            self._json = _adapter.dump_json(categorias)
+            self.etag = '"%s"' % hashlib.sha1(self._json).hexdigest()
+            self._cargado_en = time.monotonic()
+
+    async def _vigente(self) -> None:
+        if self._vencido():
+            await self.recargar(solo_si_vencido=True)
+
+    async def obtener(self, categoria_id: int) -> Optional[CategoriaSchema]:
+        await self._vigente()
+        return self._por_id.get(categoria_id)
+
+    async def existentes(self) -> Dict[int, CategoriaSchema]:
+        await self._vigente()
+        return self._por_id
+
+    async def etag_pagina(self, skip: int, limit: int) -> str:
+        """ETag de una pagina del listado: cambia con cualquier escritura."""
+        await self._vigente()
+        return '"%s-%d-%d"' % (self.etag.strip('"'), skip, limit)
+
+    async def listar(self, skip: int, limit: int) -> bytes:
+        """JSON de la pagina pedida; el catalogo completo ya esta serializado."""
+        await self._vigente()
+        skip = max(skip, 0)
+        if skip == 0 and limit >= len(self._por_id):
+            return self._json
+        return _adapter.dump_json(list(self._por_id.values())[skip:skip + limit])
+
+    async def notificar(self, db: AsyncSession) -> None:
+        """Encola el aviso a los otros workers en la transaccion de ``db``."""
+        if db.get_bind().dialect.name == "postgresql":
+            await db.execute(text("SELECT pg_notify(:canal, '')"), {"canal": CANAL_CATEGORIAS})
+
+    def _al_notificar(self, connection, pid, channel, payload) -> None:
+        asyncio.get_running_loop().create_task(self.recargar())
+
+    async def escuchar(self) -> None:
+        """Arranca la tarea que mantiene el LISTEN (solo con asyncpg)."""
+        if async_engine.dialect.driver != "asyncpg" or self._escucha is not None:
+            return
+        self._escucha = asyncio.get_running_loop().create_task(self._mantener_escucha())
+
+    async def _mantener_escucha(self) -> None:
+        """Mantiene una conexion asyncpg propia, fuera del pool, con LISTEN.
+
+        Asi no ocupa un lugar del pool de los requests. Si la conexion se
+        corta (reinicio o failover de la base) se vuelve a abrir con espera
+        exponencial, y al reconectar se recarga el catalogo por los avisos
+        que se pudieron perder mientras tanto.
+        """
+        import asyncpg
+
+        dsn = make_url(ASYNC_SQLALCHEMY_DATABASE_URL).set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        espera, reconexion = 1.0, False
+        while True:
+            conexion = None
+            try:
+                conexion = await asyncpg.connect(dsn)
+                cortada = asyncio.Event()
+                conexion.add_termination_listener(lambda _: cortada.set())
+                await conexion.add_listener(CANAL_CATEGORIAS, self._al_notificar)
+                logger.info("Escuchando cambios de categorias en el canal %s", CANAL_CATEGORIAS)
+                if reconexion:
+                    await self.recargar()
+                espera, reconexion = 1.0, True
+                while not cortada.is_set():
+                    try:
+                        await asyncio.wait_for(cortada.wait(), timeout=CATEGORIAS_LISTEN_PING)
+                    except asyncio.TimeoutError:
+                        # Un corte sin aviso (failover de red) solo se detecta usando la conexion
+                        await conexion.execute("SELECT 1", timeout=CATEGORIAS_LISTEN_PING)
+                raise ConnectionError("la base cerro la conexion")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                reconexion = True
+                logger.warning("Se perdio el LISTEN de categorias, reintentando en %.0fs: %s", espera, e)
+            finally:
+                if conexion is not None and not conexion.is_closed():
+                    conexion.terminate()
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, CATEGORIAS_LISTEN_BACKOFF_MAX)
+
+    async def detener(self) -> None:
+        if self._escucha is not None:
+            self._escucha.cancel()
+            try:
+                await self._escucha
+            except asyncio.CancelledError:
+                pass
+            self._escucha = None
+
+
+catalogo_categorias = CatalogoCategorias()
@@ -0,0 +1,164 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import BigInteger, and_, case, delete, func, insert, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Alquiler, ContratoAlquiler
+from app.services.cronograma import a_pesos, sumar_meses
+from app.services.ipc import SerieIPC, indice_ipc
+
+COLUMNAS = ["cuota", "vencimiento", "inquilino", "deuda", "pagado", "propiedad", "usuario_id", "contrato_id"]
+
+
+def calcular_cuotas(
+    meses: np.ndarray, inicios: np.ndarray, montos: np.ndarray, periodos: np.ndarray,
+    usa_ipc: np.ndarray, porcentajes: np.ndarray, ipc: Optional[SerieIPC] = None,
+) -> Dict[str, np.ndarray]:
+    """Expande cada contrato en todas sus cuotas ajustadas, sin recorrerlos en Python.
+
+    Cada ``periodos`` meses la cuota se ajusta: con IPC por la variacion del
+    indice entre el mes anterior al inicio y el mes anterior al ajuste; con
+    indice fijo por ``(1 + porcentaje / 100)`` por periodo transcurrido. Los
+    ajustes posteriores al ultimo IPC publicado usan ese ultimo valor, y se
+    corrigen al volver a generar las cuotas. Importes en centavos enteros.
+    """
+    meses = meses.astype(np.int64)
+    total = int(meses.sum())
+    primera = np.cumsum(meses) - meses
+
+    # Contrato de cada cuota y numero de cuota dentro de su contrato (0, 1, ...)
+    fila = np.repeat(np.arange(len(meses)), meses)
+    k = np.arange(total) - primera[fila]
+    periodo = k // np.maximum(periodos.astype(np.int64), 1)[fila]
+
+    inicios = inicios.astype("datetime64[D]")
+    factores = (1 + porcentajes.astype(np.float64) / 100)[fila] ** periodo
+    if ipc is not None and usa_ipc.any():
+        mes_inicial = inicios.astype("datetime64[M]")[fila]
+        mes_ajuste = mes_inicial + periodo * periodos.astype(np.int64)[fila]
+        factores = np.where(
+            usa_ipc[fila], ipc.en_meses(mes_ajuste - 1) / ipc.en_meses(mes_inicial - 1), factores
+        )
+
+    return {
+        "fila": fila,
+        "cuota": k + 1,
+        "vencimiento": sumar_meses(inicios[fila], k),
+        "monto": np.rint(montos.astype(np.int64)[fila] * factores).astype(np.int64),
+    }
+
+
+async def generar_cuotas(db: AsyncSession, usuario_id: int, contrato_ids: Optional[List[int]] = None) -> int:
+    """Regenera las cuotas de los contratos del usuario en un solo lote; devuelve cuantas inserto.
+
+    Las cuotas ya cobradas (``pagado > 0``) se conservan; el resto se borra y
+    se vuelve a insertar con los ajustes vigentes. No hace commit.
+    """
+    query = select(
+        ContratoAlquiler.id, ContratoAlquiler.propiedad, ContratoAlquiler.inquilino,
+        ContratoAlquiler.inicio, ContratoAlquiler.meses, type_coerce(ContratoAlquiler.monto_inicial, BigInteger),
+        ContratoAlquiler.periodo_ajuste, ContratoAlquiler.indice, ContratoAlquiler.porcentaje_ajuste,
+    ).where(ContratoAlquiler.usuario_id == usuario_id)
+    if contrato_ids is not None:
+        query = query.where(ContratoAlquiler.id.in_(contrato_ids))
+    contratos = (await db.execute(query.order_by(ContratoAlquiler.id))).all()
+    if not contratos:
+        return 0
+    ids, propiedades, inquilinos, inicios, meses, montos, periodos, indices, porcentajes = zip(*contratos)
+    usa_ipc = np.array(indices) == "ipc"
+    # Sin IPC cargado se propaga IPCNoDisponible
+    ipc = await indice_ipc.serie() if usa_ipc.any() else None
+    cuotas = calcular_cuotas(
+        np.array(meses, dtype=np.int64),
+        np.array(inicios, dtype="datetime64[D]"),
+        np.array(montos, dtype=np.int64),
+        np.array(periodos, dtype=np.int64),
+        usa_ipc,
+        np.array([porcentaje or 0 for porcentaje in porcentajes], dtype=np.float64),
+        ipc,
+    )
+
+    ids = np.array(ids, dtype=np.int64)
+    de_los_contratos = Alquiler.contrato_id.in_(ids.tolist())
+    cobradas = (await db.execute(
+        select(Alquiler.contrato_id, Alquiler.cuota).where(de_los_contratos, Alquiler.pagado > 0)
+    )).all()
+    await db.execute(delete(Alquiler).where(de_los_contratos, Alquiler.pagado == 0))
+
+    pendientes = np.ones(len(cuotas["fila"]), dtype=bool)
+    if cobradas:
+        # Clave (contrato, cuota) como un solo entero para compararlas con isin
+        contratos_cobrados, cuotas_cobradas = (np.array(c, dtype=np.int64) for c in zip(*cobradas))
+        base = max(int(cuotas["cuota"].max()), int(cuotas_cobradas.max())) + 1
+        claves = ids[cuotas["fila"]] * base + cuotas["cuota"]
+        pendientes = ~np.isin(claves, contratos_cobrados * base + cuotas_cobradas)
+    filas = cuotas["fila"][pendientes].tolist()
+    numeros = cuotas["cuota"][pendientes].tolist()
+    vencimientos = cuotas["vencimiento"][pendientes].tolist()
+    montos = cuotas["monto"][pendientes].tolist()
+    if not filas:
+        return 0
+
+    conn = await db.connection()
+    if conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Alquiler.__tablename__,
+            # COPY no pasa por el tipo Centavos: deuda y pagado van ya en centavos
+            records=[
+                (numero, vencimiento, inquilinos[fila], monto, 0, propiedades[fila], usuario_id, int(ids[fila]))
+                for fila, numero, vencimiento, monto in zip(filas, numeros, vencimientos, montos)
+            ],
+            columns=COLUMNAS,
+        )
+    else:
+        await db.execute(insert(Alquiler), [
+            dict(zip(COLUMNAS, (
+                numero, vencimiento, inquilinos[fila], Decimal(monto).scaleb(-2), Decimal(0),
+                propiedades[fila], usuario_id, int(ids[fila]),
+            )))
+            for fila, numero, vencimiento, monto in zip(filas, numeros, vencimientos, montos)
+        ])
+    return len(filas)
+
+
+async def cartera_por_propiedad(db: AsyncSession, usuario_id: int, hoy: date) -> List[Dict]:
+    """Rent roll: una fila por propiedad con el alquiler del mes, lo cobrado y la deuda vencida.
+
+    Es un solo GROUP BY con agregados condicionales sobre el indice (usuario_id, vencimiento).
+    """
+    inicio_mes = hoy.replace(day=1)
+    fin_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+    deuda = type_coerce(Alquiler.deuda, BigInteger)
+    pagado = type_coerce(Alquiler.pagado, BigInteger)
+    del_mes = and_(Alquiler.vencimiento >= inicio_mes, Alquiler.vencimiento < fin_mes)
+    vencida = and_(Alquiler.vencimiento <= hoy, Alquiler.deuda > Alquiler.pagado)
+    rows = (await db.execute(
+        select(
+            Alquiler.propiedad,
+            func.count(func.distinct(Alquiler.inquilino)),
+            func.sum(case((del_mes, deuda), else_=0)),
+            func.sum(pagado),
+            func.sum(case((vencida, deuda - pagado), else_=0)),
+            func.sum(case((vencida, 1), else_=0)),
+            func.min(case((and_(Alquiler.vencimiento > hoy, Alquiler.deuda > Alquiler.pagado), Alquiler.vencimiento))),
+        )
+        .where(Alquiler.usuario_id == usuario_id)
+        .group_by(Alquiler.propiedad)
+        .order_by(Alquiler.propiedad)
+    )).all()
+    return [
+        {
+            "propiedad": propiedad,
+            "inquilinos": inquilinos,
+            "alquiler_mes": a_pesos(del_mes_total or 0),
+            "cobrado": a_pesos(cobrado or 0),
+            "deuda_vencida": a_pesos(deuda_vencida or 0),
+            "cuotas_vencidas": cuotas_vencidas or 0,
+            "proximo_vencimiento": proximo,
+        }
+        for propiedad, inquilinos, del_mes_total, cobrado, deuda_vencida, cuotas_vencidas, proximo in rows
+    ]
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import os
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from app.database.database import AsyncSessionLocal
+from app.models.models import Cotizacion
+
+load_dotenv()
+
+SERIES = ("oficial", "mep", "blue")
+
+# Cada cuanto se vuelve a leer la tabla cotizaciones (la carga por CSV no avisa a los workers)
+COTIZACIONES_CACHE_TTL = float(os.getenv("COTIZACIONES_CACHE_TTL", 3600))
+
+
+class CotizacionNoDisponible(LookupError):
+    """No hay cotizaciones cargadas para la serie pedida."""
+
+
+class Serie:
+    """Cotizaciones de una serie ordenadas por fecha, como arrays paralelos.
+
+    ``version`` resume el contenido: cambia solo si cambian las cotizaciones.
+    """
+
+    def __init__(self, fechas: List[date], valores: List[float]):
+        self.fechas = np.array(fechas, dtype="datetime64[D]")
+        self.valores = np.array(valores, dtype=np.float64)
+        self.version = hashlib.sha1(self.fechas.tobytes() + self.valores.tobytes()).hexdigest()[:16]
+
+    def en_fechas(self, fechas: np.ndarray) -> np.ndarray:
+        """Ultima cotizacion publicada en o antes de cada fecha, en una sola pasada
+        (busqueda binaria vectorizada). Antes de la primera se usa la primera disponible."""
+        posiciones = np.searchsorted(self.fechas, fechas.astype("datetime64[D]"), side="right") - 1
+        return self.valores[np.maximum(posiciones, 0)]
+
+
+class IndiceCotizaciones:
+    """Copia en memoria de la tabla cotizaciones, indexada por serie y fecha."""
+
+    def __init__(self, ttl: float = COTIZACIONES_CACHE_TTL):
+        self.ttl = ttl
+        self._series: Dict[str, Serie] = {}
+        self._cargado_en: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _vencido(self) -> bool:
+        return self._cargado_en is None or time.monotonic() - self._cargado_en > self.ttl
+
+    async def recargar(self, solo_si_vencido: bool = False) -> None:
+        async with self._lock:
+            if solo_si_vencido and not self._vencido():
+                return
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(Cotizacion.serie, Cotizacion.fecha, Cotizacion.valor)
+                    .order_by(Cotizacion.serie, Cotizacion.fecha)
+                )).all()
+            por_serie: Dict[str, Tuple[List[date], List[float]]] = {}
+            for serie, fecha, valor in rows:
+                fechas, valores = por_serie.setdefault(serie, ([], []))
+                fechas.append(fecha)
+                valores.append(float(valor))
+            self._series = {serie: Serie(*datos) for serie, datos in por_serie.items()}
+            self._cargado_en = time.monotonic()
+
+    async def serie(self, nombre: str) -> Serie:
+        if self._vencido():
+            await self.recargar(solo_si_vencido=True)
+        serie = self._series.get(nombre)
+        if serie is None:
+            raise CotizacionNoDisponible(nombre)
+        return serie
+
+
+indice_cotizaciones = IndiceCotizaciones()
+
+
+def convertir(
+    montos_ars: np.ndarray, montos_usd: np.ndarray, cotizaciones: np.ndarray, moneda: str
+) -> np.ndarray:
+    """Total de cada fila expresado en ``moneda``, redondeado al centavo."""
+    if moneda == "USD":
+        total = montos_ars / cotizaciones + montos_usd
+    else:
+        total = montos_ars + montos_usd * cotizaciones
+    return np.round(total, 2)
+
+
+def normalizar_servicios(filas: List[Dict], serie: Serie, moneda: str) -> List[Dict]:
+    """Agrega a cada servicio su total en ``moneda`` segun la cotizacion de su vencimiento."""
+    if not filas:
+        return filas
+    fechas = np.array([fila["vencimiento"] for fila in filas], dtype="datetime64[D]")
+    ars = np.array([fila["monto_ars"] or 0 for fila in filas], dtype=np.float64)
+    usd = np.array([fila["monto_usd"] or 0 for fila in filas], dtype=np.float64)
+    tasas = serie.en_fechas(fechas)
+    totales = convertir(ars, usd, tasas, moneda)
+    for fila, tasa, total in zip(filas, tasas.tolist(), totales.tolist()):
+        fila.update(moneda=moneda, cotizacion=tasa, monto_total=total)
+    return filas
+
+
+def normalizar_resumen(filas: List[Dict], serie: Serie, moneda: str) -> List[Dict]:
+    """Convierte los totales mensuales (en pesos) con la cotizacion del cierre de cada mes.
+
+    Para el mes en curso se usa la ultima cotizacion disponible a hoy.
+    """
+    if not filas:
+        return filas
+    meses = np.array([fila["mes"] for fila in filas], dtype="datetime64[M]")
+    cierre = np.minimum((meses + 1).astype("datetime64[D]") - 1, np.datetime64(date.today(), "D"))
+    totales = np.array([fila["total"] for fila in filas], dtype=np.float64)
+    tasas = serie.en_fechas(cierre)
+    convertidos = convertir(totales, np.zeros(len(filas)), tasas, moneda)
+    for fila, tasa, convertido in zip(filas, tasas.tolist(), convertidos.tolist()):
+        fila.update(moneda=moneda, cotizacion=tasa, total_convertido=convertido)
+    return filas
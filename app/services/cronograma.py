@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import BigInteger, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass
+class Cronograma:
+    """Cuotas pendientes de todos los creditos de un usuario, una fila por cuota.
+
+    Cada atributo es un array de numpy con la misma longitud; los importes
+    son centavos enteros (int64), igual que en la base.
+    """
+    credito_id: np.ndarray
+    numero: np.ndarray
+    vencimiento: np.ndarray  # datetime64[D]
+    monto: np.ndarray
+    pagado_acumulado: np.ndarray
+    restante: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.credito_id)
+
+
+def sumar_meses(fechas: np.ndarray, meses: np.ndarray) -> np.ndarray:
+    """Mismo dia ``meses`` meses despues, o el ultimo dia del mes si este es mas corto."""
+    dia = (fechas - fechas.astype("datetime64[M]").astype("datetime64[D]")).astype(np.int64)
+    destino = fechas.astype("datetime64[M]") + meses
+    ultimo_dia = (destino + 1).astype("datetime64[D]") - 1
+    return np.minimum(destino.astype("datetime64[D]") + dia, ultimo_dia)
+
+
+def calcular_cronograma(
+    ids: np.ndarray, cuotas: np.ndarray, vencimientos: np.ndarray,
+    deudas: np.ndarray, pagos: np.ndarray,
+) -> Cronograma:
+    """Expande cada credito en sus cuotas pendientes sin recorrerlos en Python.
+
+    ``cuotas`` es la cantidad de cuotas que faltan pagar y ``vencimientos`` la
+    fecha de la proxima. El saldo (deuda - pago, en centavos) se reparte en
+    cuotas iguales de centavos enteros; el resto de la division suma un
+    centavo a cada una de las primeras cuotas, asi ninguna queda negativa. Las siguientes
+    cuotas vencen el mismo dia de los meses siguientes, o el ultimo dia del
+    mes si este es mas corto.
+    """
+    cuotas = cuotas.astype(np.int64)
+    deudas, pagos = deudas.astype(np.int64), pagos.astype(np.int64)
+    saldo = deudas - pagos
+    total = int(cuotas.sum())
+    inicio = np.cumsum(cuotas) - cuotas
+
+    # Indice de la cuota dentro de su credito: 0, 1, ..., cuotas - 1
+    fila_credito = np.repeat(np.arange(len(ids)), cuotas)
+    k = np.arange(total) - inicio[fila_credito]
+
+    fechas = sumar_meses(vencimientos.astype("datetime64[D]")[fila_credito], k)
+
+    # saldo = base * cuotas + resto: las primeras ``resto`` cuotas llevan un centavo mas
+    base, resto = np.divmod(saldo, np.maximum(cuotas, 1))
+    montos = base[fila_credito] + (k < resto[fila_credito])
+
+    # Acumulado dentro de cada credito: cumsum global menos lo acumulado antes de su primera cuota
+    acumulado = np.cumsum(montos)
+    previo = np.concatenate(([0], acumulado))[inicio]
+    pagado_en_cronograma = acumulado - previo[fila_credito]
+
+    return Cronograma(
+        credito_id=ids[fila_credito],
+        numero=k + 1,
+        vencimiento=fechas,
+        monto=montos,
+        pagado_acumulado=pagos[fila_credito] + pagado_en_cronograma,
+        restante=saldo[fila_credito] - pagado_en_cronograma,
+    )
+
+
+def agrupar_por_mes(cronograma: Cronograma) -> Dict[str, np.ndarray]:
+    """Total a pagar por mes y saldo pendiente de todos los creditos al cerrar cada mes."""
+    meses, inversa = np.unique(cronograma.vencimiento.astype("datetime64[M]"), return_inverse=True)
+    # bincount con pesos devuelve float64, exacto para centavos enteros
+    montos = np.rint(np.bincount(inversa, weights=cronograma.monto, minlength=len(meses))).astype(np.int64)
+    cantidad = np.bincount(inversa, minlength=len(meses))
+    restante = cronograma.monto.sum() - np.cumsum(montos)
+    return {
+        "mes": meses.astype("datetime64[D]"),
+        "monto": a_pesos(montos),
+        "cuotas": cantidad,
+        "restante": a_pesos(restante),
+    }
+
+
+def a_pesos(centavos: np.ndarray) -> np.ndarray:
+    """Centavos enteros a importes con dos decimales para la respuesta JSON."""
+    return centavos / 100
+
+
+def columnas_a_filas(columnas: Dict[str, np.ndarray]) -> List[Dict]:
+    """Pasa de columnas a filas listas para orjson (fechas ya como texto ISO)."""
+    listas = {
+        nombre: (
+            np.datetime_as_string(valores) if np.issubdtype(valores.dtype, np.datetime64) else valores
+        ).tolist()
+        for nombre, valores in columnas.items()
+    }
+    return [dict(zip(listas, fila)) for fila in zip(*listas.values())]
+
+
+def filas_de(objetos: List, modelo) -> List[Dict]:
+    """Filas del ORM como diccionarios con las columnas de ``modelo``, para agregarles campos calculados."""
+    columnas = [columna.key for columna in modelo.__table__.columns]
+    return [{columna: getattr(objeto, columna) for columna in columnas} for objeto in objetos]
+
+
+async def cronograma_usuario(db: AsyncSession, modelo, usuario_id: int) -> Cronograma:
+    """Lee los creditos impagos del usuario (indice parcial ``*_impagas``) y calcula el cronograma."""
+    # Los importes se leen como los centavos enteros de la columna, sin pasar por Decimal
+    rows = (await db.execute(
+        select(
+            modelo.id, modelo.cuotas, modelo.vencimiento,
+            type_coerce(modelo.deuda, BigInteger), type_coerce(modelo.pago, BigInteger),
+        )
+        .where(modelo.usuario_id == usuario_id, modelo.deuda > modelo.pago, modelo.cuotas > 0)
+        .order_by(modelo.vencimiento, modelo.id)
+    )).all()
+    ids, cuotas, vencimientos, deudas, pagos = zip(*rows) if rows else ((),) * 5
+    return calcular_cronograma(
+        np.array(ids, dtype=np.int64),
+        np.array(cuotas, dtype=np.int64),
+        np.array(vencimientos, dtype="datetime64[D]"),
+        np.array(deudas, dtype=np.int64),
+        np.array(pagos, dtype=np.int64),
+    )
+
+
+def cuotas_como_filas(cronograma: Cronograma) -> List[Dict]:
+    return columnas_a_filas({
+        "credito_id": cronograma.credito_id,
+        "numero": cronograma.numero,
+        "vencimiento": cronograma.vencimiento,
+        "monto": a_pesos(cronograma.monto),
+        "pagado_acumulado": a_pesos(cronograma.pagado_acumulado),
+        "restante": a_pesos(cronograma.restante),
+    })
+
+
+def meses_como_filas(cronograma: Cronograma) -> List[Dict]:
+    return columnas_a_filas(agrupar_por_mes(cronograma))
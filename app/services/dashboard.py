@@ -0,0 +1,131 @@
+import asyncio
+import os
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from pydantic import TypeAdapter
+from sqlalchemy import func, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import RequestSessionLocal
+from app.models.models import Alquiler, Centavos, OtroCredito, ResumenMensual, Servicio, TarjetaCredito, Transaccion
+from app.schemas.schemas import Dashboard, Usuario
+from app.services.ipc import SerieIPC, deflactar
+from app.services.vencimientos import listar_vencimientos
+
+T = TypeVar("T")
+
+# Conexiones extra del pool que puede usar un dashboard a la vez, ademas de la del request
+DASHBOARD_CONEXIONES = int(os.getenv("DASHBOARD_CONEXIONES", 2))
+
+_adapter = TypeAdapter(Dashboard)
+
+
+async def _en_sesion(
+    consulta: Callable[[AsyncSession], Awaitable[T]], replica: bool, limite: asyncio.Semaphore
+) -> T:
+    """Corre ``consulta`` con su propia sesion (su propia conexion del pool), con el mismo
+    ruteo a la replica que la sesion del request y sin pasar de ``limite`` a la vez."""
+    async with limite:
+        async with RequestSessionLocal(info={"replica": replica}) as db:
+            return await consulta(db)
+
+
+def _pendiente(modelo, pagado):
+    return select(func.coalesce(func.sum(type_coerce(modelo.deuda - pagado, Centavos)), 0)).where(
+        modelo.deuda > pagado
+    )
+
+
+async def _totales_mes(db: AsyncSession, usuario_id: int, mes: date) -> Dict[str, Decimal]:
+    rows = await db.execute(
+        select(ResumenMensual.tipo, func.sum(ResumenMensual.total))
+        .where(ResumenMensual.usuario_id == usuario_id, ResumenMensual.mes == mes)
+        .group_by(ResumenMensual.tipo)
+    )
+    return dict(rows.all())
+
+
+def _deuda(modelo, pagado, usuario_id: int):
+    return _pendiente(modelo, pagado).where(modelo.usuario_id == usuario_id).scalar_subquery()
+
+
+def _servicios_mes(columna, usuario_id: int, mes: date, siguiente: date):
+    return select(func.coalesce(func.sum(columna), 0)).where(
+        Servicio.usuario_id == usuario_id,
+        Servicio.vencimiento >= mes,
+        Servicio.vencimiento < siguiente,
+    ).scalar_subquery()
+
+
+async def _saldos(db: AsyncSession, usuario_id: int, mes: date, siguiente: date):
+    """Deudas pendientes y servicios del mes en una sola consulta (subconsultas escalares)."""
+    return (await db.execute(select(
+        type_coerce(_deuda(TarjetaCredito, TarjetaCredito.pago, usuario_id), Centavos),
+        type_coerce(_deuda(OtroCredito, OtroCredito.pago, usuario_id), Centavos),
+        type_coerce(_deuda(Alquiler, Alquiler.pagado, usuario_id), Centavos),
+        type_coerce(_servicios_mes(Servicio.monto_ars, usuario_id, mes, siguiente), Centavos),
+        type_coerce(_servicios_mes(Servicio.monto_usd, usuario_id, mes, siguiente), Centavos),
+    ))).one()
+
+
+async def _ultimas_transacciones(db: AsyncSession, usuario_id: int, cantidad: int) -> List[Transaccion]:
+    result = await db.scalars(
+        select(Transaccion)
+        .where(Transaccion.usuario_id == usuario_id)
+        .order_by(Transaccion.fecha.desc(), Transaccion.id.desc())
+        .limit(cantidad)
+    )
+    return result.all()
+
+
+async def armar_dashboard(
+    db: AsyncSession, usuario, hoy: date, ultimas: int, dias: int,
+    ipc: Optional[SerieIPC] = None, base: Optional[str] = None,
+) -> bytes:
+    """Arma el dashboard del usuario en JSON.
+
+    Son cuatro consultas que corren a la vez: una en la sesion del request
+    (``db``) y las demas en sesiones propias, como mucho ``DASHBOARD_CONEXIONES``
+    conexiones extra por request. Todas leen de la replica si ``db`` lo hace.
+    Con ``ipc`` los totales en pesos del mes se expresan tambien en pesos de ``base``.
+    """
+    mes = hoy.replace(day=1)
+    siguiente = (mes + timedelta(days=32)).replace(day=1)
+    usuario_id = usuario.id
+    replica = bool(db.info.get("replica"))
+    limite = asyncio.Semaphore(max(DASHBOARD_CONEXIONES, 1))
+    (
+        totales_mes, (deuda_tarjetas, deuda_creditos, alquileres, servicios_ars, servicios_usd),
+        transacciones, vencimientos,
+    ) = await asyncio.gather(
+        _totales_mes(db, usuario_id, mes),
+        _en_sesion(lambda s: _saldos(s, usuario_id, mes, siguiente), replica, limite),
+        _en_sesion(lambda s: _ultimas_transacciones(s, usuario_id, ultimas), replica, limite),
+        _en_sesion(
+            lambda s: listar_vencimientos(s, usuario_id, hoy, hoy + timedelta(days=dias), True), replica, limite
+        ),
+    )
+    ingresos = totales_mes.get("ingreso", Decimal(0))
+    egresos = totales_mes.get("egreso", Decimal(0))
+    totales = {
+        "mes": mes,
+        "ingresos_mes": ingresos,
+        "egresos_mes": egresos,
+        "neto_mes": ingresos - egresos,
+        "deuda_tarjetas": deuda_tarjetas,
+        "deuda_otros_creditos": deuda_creditos,
+        "alquileres_por_cobrar": alquileres,
+        "servicios_mes_ars": servicios_ars,
+        "servicios_mes_usd": servicios_usd,
+    }
+    if ipc is not None:
+        for campo in ("ingresos_mes", "egresos_mes", "neto_mes", "servicios_mes_ars"):
+            deflactar([totales], "mes", campo, ipc, base)
+    return _adapter.dump_json(_adapter.validate_python({
+        "usuario": Usuario.model_validate(usuario),
+        "totales": totales,
+        "ultimas_transacciones": transacciones,
+        "proximos_vencimientos": vencimientos,
+    }, from_attributes=True))
@@ -0,0 +1,54 @@
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Transaccion, a_centavos
+from app.schemas.schemas import TransaccionCreate
+
+COLUMNAS = ["fecha", "tipo", "categoria_id", "detalle", "monto", "medio_de_pago", "usuario_id"]
+
+def _registro(transaccion: TransaccionCreate, monto) -> tuple:
+    return (
+        transaccion.fecha,
+        transaccion.tipo.value,
+        transaccion.categoria_id,
+        transaccion.detalle,
+        monto,
+        transaccion.medio_de_pago,
+        transaccion.usuario_id,
+    )
+
+async def insertar_transacciones(db: AsyncSession, transacciones: List[TransaccionCreate]) -> None:
+    """Inserta un lote de transacciones dentro de la transaccion actual de ``db``.
+
+    Con asyncpg usa COPY (un solo round-trip para todo el lote); con otros
+    drivers cae en un INSERT multi-fila de SQLAlchemy. No hace commit. Una
+    categoria inexistente se informa como ``IntegrityError`` en ambos casos.
+    """
+    conn = await db.connection()
+    if conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        if not raw.driver_connection.is_in_transaction():
+            # El adaptador asyncpg de SQLAlchemy recien manda BEGIN con la primera
+            # sentencia que pasa por el cursor; COPY va directo a asyncpg y como
+            # primera sentencia quedaria en autocommit, fuera de la transaccion
+            # que despues actualiza el resumen mensual y hace commit o rollback
+            await conn.exec_driver_sql("SELECT 1")
+        import asyncpg
+        try:
+            await raw.driver_connection.copy_records_to_table(
+                Transaccion.__tablename__,
+                # COPY no pasa por el tipo Centavos: el monto va ya en centavos
+                records=[_registro(t, a_centavos(t.monto)) for t in transacciones],
+                columns=COLUMNAS,
+            )
+        except asyncpg.IntegrityConstraintViolationError as e:
+            # Mismo error que daria el INSERT, para que el llamador lo maneje igual
+            raise IntegrityError(f"COPY {Transaccion.__tablename__}", None, e) from e
+    else:
+        await db.execute(
+            insert(Transaccion),
+            [dict(zip(COLUMNAS, _registro(t, t.monto))) for t in transacciones],
+        )
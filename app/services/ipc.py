@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from app.database.database import AsyncSessionLocal
+from app.models.models import IndicePrecios
+
+load_dotenv()
+
+# Cada cuanto se vuelve a leer la tabla indice_precios (la carga por CSV no avisa a los workers)
+IPC_CACHE_TTL = float(os.getenv("IPC_CACHE_TTL", 3600))
+
+
+class IPCNoDisponible(LookupError):
+    """No hay indice de precios cargado, o no para el mes base pedido."""
+
+
+class SerieIPC:
+    """Indice de precios mensual como arrays paralelos ordenados por mes.
+
+    ``version`` resume el contenido: cambia solo si cambia el indice.
+    """
+
+    def __init__(self, meses: List, valores: List[float]):
+        self.meses = np.array(meses, dtype="datetime64[M]")
+        self.valores = np.array(valores, dtype=np.float64)
+        self.version = hashlib.sha1(self.meses.tobytes() + self.valores.tobytes()).hexdigest()[:16]
+
+    @property
+    def ultimo_mes(self) -> np.datetime64:
+        return self.meses[-1]
+
+    def en_meses(self, meses: np.ndarray) -> np.ndarray:
+        """Indice de cada mes en una sola pasada (searchsorted).
+
+        Los meses posteriores al ultimo publicado usan el ultimo valor y los
+        anteriores al primero usan el primero.
+        """
+        posiciones = np.searchsorted(self.meses, meses.astype("datetime64[M]"), side="right") - 1
+        return self.valores[np.maximum(posiciones, 0)]
+
+    def coeficientes(self, meses: np.ndarray, base: np.datetime64) -> np.ndarray:
+        """Factor que lleva importes de cada mes a pesos de ``base``: IPC(base) / IPC(mes)."""
+        return self.en_meses(np.array([base]))[0] / self.en_meses(meses)
+
+
+class IndiceIPC:
+    """Copia en memoria de la tabla indice_precios."""
+
+    def __init__(self, ttl: float = IPC_CACHE_TTL):
+        self.ttl = ttl
+        self._serie: Optional[SerieIPC] = None
+        self._cargado_en: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _vencido(self) -> bool:
+        return self._cargado_en is None or time.monotonic() - self._cargado_en > self.ttl
+
+    async def recargar(self, solo_si_vencido: bool = False) -> None:
+        async with self._lock:
+            if solo_si_vencido and not self._vencido():
+                return
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(IndicePrecios.mes, IndicePrecios.valor).order_by(IndicePrecios.mes)
+                )).all()
+            self._serie = SerieIPC([mes for mes, _ in rows], [float(valor) for _, valor in rows]) if rows else None
+            self._cargado_en = time.monotonic()
+
+    async def serie(self) -> SerieIPC:
+        if self._vencido():
+            await self.recargar(solo_si_vencido=True)
+        if self._serie is None:
+            raise IPCNoDisponible("ipc")
+        return self._serie
+
+
+indice_ipc = IndiceIPC()
+
+
+def deflactar(
+    filas: List[Dict], campo_fecha: str, campo_monto: str, serie: SerieIPC, base: Optional[str] = None
+) -> List[Dict]:
+    """Agrega a cada fila ``<campo_monto>_real``: el monto nominal expresado en pesos del mes ``base``.
+
+    ``base`` es ``YYYY-MM``; si no se indica se usa el ultimo mes publicado.
+    El coeficiente de cada mes se calcula para todas las filas a la vez.
+    """
+    mes_base = np.datetime64(base, "M") if base else serie.ultimo_mes
+    if mes_base < serie.meses[0] or mes_base > serie.ultimo_mes:
+        raise IPCNoDisponible(base)
+    if not filas:
+        return filas
+    meses = np.array([fila[campo_fecha] for fila in filas], dtype="datetime64[M]")
+    montos = np.array([fila[campo_monto] or 0 for fila in filas], dtype=np.float64)
+    coeficientes = serie.coeficientes(meses, mes_base)
+    reales = np.round(montos * coeficientes, 2)
+    etiqueta = str(mes_base)
+    for fila, coeficiente, real in zip(filas, coeficientes.tolist(), reales.tolist()):
+        fila.update({"ajuste": "ipc", "base": etiqueta, "coeficiente": coeficiente, f"{campo_monto}_real": real})
+    return filas
@@ -0,0 +1,207 @@
+import os
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import orjson
+from dotenv import load_dotenv
+from sqlalchemy import BigInteger, func, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.models.models import Alquiler, ContratoAlquiler, OtroCredito, ResumenMensual, Servicio, TarjetaCredito
+from app.services.cronograma import Cronograma, a_pesos, columnas_a_filas, cronograma_usuario
+
+load_dotenv()
+
+# Meses hacia atras que se promedian para proyectar ingresos y egresos
+PROYECCION_MESES_HISTORIA = int(os.getenv("PROYECCION_MESES_HISTORIA", 12))
+
+# Proyecciones ya calculadas, por (usuario, meses). La entrada solo se reutiliza
+# si la version de los datos del usuario (ver ``version_datos``) no cambio.
+proyeccion_cache = TTLCache(
+    maxsize=int(os.getenv("PROYECCION_CACHE_SIZE", 1000)),
+    ttl=float(os.getenv("PROYECCION_CACHE_TTL", 3600)),
+)
+
+def _centavos(columna):
+    """Lee una columna Centavos como el entero guardado, sin pasar por Decimal."""
+    return type_coerce(columna, BigInteger)
+
+def _indices_mes(fechas: np.ndarray, inicio: np.datetime64) -> np.ndarray:
+    """Posicion de cada fecha en el horizonte (0 = mes de inicio, negativo = vencido)."""
+    return (fechas.astype("datetime64[M]") - inicio).astype(np.int64)
+
+def _por_mes(indices: np.ndarray, montos: np.ndarray, meses: int) -> np.ndarray:
+    """Suma ``montos`` por mes; lo vencido se imputa al primer mes."""
+    indices = np.maximum(indices, 0)
+    dentro = indices < meses
+    # bincount devuelve enteros si no hay ningun indice
+    return np.bincount(indices[dentro], weights=montos[dentro], minlength=meses).astype(np.float64)
+
+def _recurrentes(
+    claves: np.ndarray, fechas: np.ndarray, montos: np.ndarray, inicio: np.datetime64, meses: int,
+    hasta: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Repite el ultimo monto de cada clave todos los meses posteriores a su ultima fecha.
+
+    Solo se repiten las claves activas en el mes de inicio, es decir con su
+    ultima fecha en el mes anterior o despues: lo que dejo de facturarse
+    antes ya termino. ``hasta`` (indice de mes, exclusivo, por fila) corta
+    la repeticion, por ejemplo al terminar el contrato. Se arma con un
+    array de diferencias: +monto en el mes en que empieza la repeticion,
+    -monto en el que termina y un cumsum, sin recorrer meses ni claves en Python.
+    """
+    if len(claves) == 0:
+        return np.zeros(meses)
+    if hasta is None:
+        hasta = np.full(len(claves), meses)
+    orden = np.lexsort((fechas, claves))
+    claves, fechas, montos, hasta = claves[orden], fechas[orden], montos[orden], hasta[orden]
+    ultimo = np.r_[claves[1:] != claves[:-1], True]
+    indices = _indices_mes(fechas[ultimo], inicio)
+    activo = indices >= -1
+    desde = np.clip(indices[activo] + 1, 0, meses)
+    fin = np.clip(hasta[ultimo][activo], 0, meses)
+    vigente = desde < fin
+    diferencias = np.zeros(meses + 1)
+    np.add.at(diferencias, desde[vigente], montos[ultimo][activo][vigente])
+    np.add.at(diferencias, fin[vigente], -montos[ultimo][activo][vigente])
+    return np.cumsum(diferencias)[:meses]
+
+async def version_datos(db: AsyncSession, usuario_id: int) -> Tuple:
+    """Ultima modificacion y cantidad de filas de cada tabla que entra en la proyeccion.
+
+    La cantidad detecta los borrados, que no mueven el maximo de updated_at.
+    Es una sola consulta con subconsultas escalares sobre los indices por usuario.
+    """
+    columnas = []
+    for modelo in (ResumenMensual, TarjetaCredito, OtroCredito, Alquiler, ContratoAlquiler, Servicio):
+        modificado = modelo.updated_at
+        if hasattr(modelo, "created_at"):
+            modificado = func.coalesce(modelo.updated_at, modelo.created_at)
+        filtro = modelo.usuario_id == usuario_id
+        columnas.append(select(func.max(modificado)).where(filtro).scalar_subquery())
+        columnas.append(select(func.count()).select_from(modelo).where(filtro).scalar_subquery())
+    return tuple((await db.execute(select(*columnas))).one())
+
+async def _promedios_historicos(db: AsyncSession, usuario_id: int, inicio: np.datetime64) -> Dict[str, float]:
+    """Promedio mensual por categoria de los ultimos meses (desde resumen_mensual), sumado por tipo."""
+    desde = (inicio - PROYECCION_MESES_HISTORIA).astype("datetime64[D]").item()
+    rows = (await db.execute(
+        select(
+            ResumenMensual.categoria_id, ResumenMensual.tipo, ResumenMensual.mes,
+            _centavos(ResumenMensual.total),
+        )
+        .where(
+            ResumenMensual.usuario_id == usuario_id,
+            ResumenMensual.mes >= desde,
+            ResumenMensual.mes < inicio.astype("datetime64[D]").item(),
+        )
+    )).all()
+    if not rows:
+        return {"ingreso": 0.0, "egreso": 0.0}
+    categorias, tipos, meses, totales = (np.array(columna) for columna in zip(*rows))
+    # Se promedia sobre los meses desde el primero con datos, para no diluir a usuarios nuevos
+    meses = np.array(meses, dtype="datetime64[M]")
+    cantidad_meses = int((inicio - meses.min()).astype(np.int64))
+    claves = np.char.add(np.char.add(tipos.astype(str), "\x1f"), categorias.astype(str))
+    _, inversa = np.unique(claves, return_inverse=True)
+    por_categoria = np.bincount(inversa, weights=totales.astype(np.float64)) / cantidad_meses
+    tipo_por_categoria = tipos[np.unique(inversa, return_index=True)[1]]
+    return {
+        tipo: float(por_categoria[tipo_por_categoria == tipo].sum())
+        for tipo in ("ingreso", "egreso")
+    }
+
+def _pesos(centavos: np.ndarray) -> np.ndarray:
+    return a_pesos(np.rint(centavos))
+
+async def calcular_proyeccion(db: AsyncSession, usuario_id: int, meses: int, inicio: date) -> bytes:
+    """Calcula la proyeccion en centavos y la devuelve como JSON con dos decimales."""
+    mes_inicio = np.datetime64(inicio, "M")
+    promedios = await _promedios_historicos(db, usuario_id, mes_inicio)
+
+    cuotas = {}
+    for nombre, modelo in (("cuotas_tarjetas", TarjetaCredito), ("cuotas_creditos", OtroCredito)):
+        cronograma: Cronograma = await cronograma_usuario(db, modelo, usuario_id)
+        cuotas[nombre] = _por_mes(_indices_mes(cronograma.vencimiento, mes_inicio), cronograma.monto, meses)
+
+    # Alquileres: lo pendiente de cada cuota en su mes y, despues de la ultima
+    # cuota de cada propiedad/inquilino todavia activo, el mismo alquiler todos
+    # los meses; si la cuota es de un contrato, solo hasta que este termina
+    alquileres = (await db.execute(
+        select(
+            Alquiler.propiedad, Alquiler.inquilino, Alquiler.vencimiento,
+            _centavos(Alquiler.deuda), _centavos(Alquiler.pagado),
+            ContratoAlquiler.inicio, ContratoAlquiler.meses,
+        )
+        .outerjoin(ContratoAlquiler, Alquiler.contrato_id == ContratoAlquiler.id)
+        .where(Alquiler.usuario_id == usuario_id)
+    )).all()
+    ingresos_alquiler = np.zeros(meses)
+    if alquileres:
+        propiedades, inquilinos, vencimientos, deudas, pagados, inicios, duraciones = (
+            np.array(c) for c in zip(*alquileres)
+        )
+        vencimientos = vencimientos.astype("datetime64[D]")
+        deudas, pagados = deudas.astype(np.float64), pagados.astype(np.float64)
+        indices = _indices_mes(vencimientos, mes_inicio)
+        ingresos_alquiler = _por_mes(indices, np.maximum(deudas - pagados, 0), meses)
+        claves = np.char.add(np.char.add(propiedades.astype(str), "\x1f"), inquilinos.astype(str))
+        # Fin del contrato (inicio + meses, exclusivo) como indice de mes; sin contrato no hay fin
+        con_contrato = np.not_equal(inicios, None)
+        hasta = np.full(len(claves), meses, dtype=np.int64)
+        if con_contrato.any():
+            fin = inicios[con_contrato].astype("datetime64[M]") + duraciones[con_contrato].astype(np.int64)
+            hasta[con_contrato] = (fin - mes_inicio).astype(np.int64)
+        ingresos_alquiler += _recurrentes(claves, vencimientos, deudas, mes_inicio, meses, hasta)
+
+    # Servicios: los ya cargados en su mes y el ultimo monto de cada servicio
+    # todavia activo repetido todos los meses siguientes
+    servicios = (await db.execute(
+        select(Servicio.servicio, Servicio.vencimiento, _centavos(func.coalesce(Servicio.monto_ars, 0)))
+        .where(Servicio.usuario_id == usuario_id)
+    )).all()
+    egresos_servicios = np.zeros(meses)
+    if servicios:
+        nombres, vencimientos, montos = (np.array(c) for c in zip(*servicios))
+        vencimientos = vencimientos.astype("datetime64[D]")
+        montos = montos.astype(np.float64)
+        indices = _indices_mes(vencimientos, mes_inicio)
+        futuros = indices >= 0
+        egresos_servicios = _por_mes(indices[futuros], montos[futuros], meses)
+        egresos_servicios += _recurrentes(nombres.astype(str), vencimientos, montos, mes_inicio, meses)
+
+    # Los promedios se redondean al centavo para que neto y saldo cierren exactos
+    transacciones_ingreso = np.full(meses, np.rint(promedios["ingreso"]))
+    transacciones_egreso = np.full(meses, np.rint(promedios["egreso"]))
+    ingresos = transacciones_ingreso + ingresos_alquiler
+    egresos = transacciones_egreso + cuotas["cuotas_tarjetas"] + cuotas["cuotas_creditos"] + egresos_servicios
+    neto = ingresos - egresos
+
+    filas = columnas_a_filas({
+        "mes": (mes_inicio + np.arange(meses)).astype("datetime64[D]"),
+        "ingresos": _pesos(ingresos),
+        "egresos": _pesos(egresos),
+        "neto": _pesos(neto),
+        "saldo_acumulado": _pesos(np.cumsum(neto)),
+        "transacciones_ingreso": _pesos(transacciones_ingreso),
+        "transacciones_egreso": _pesos(transacciones_egreso),
+        "cuotas_tarjetas": _pesos(cuotas["cuotas_tarjetas"]),
+        "cuotas_creditos": _pesos(cuotas["cuotas_creditos"]),
+        "alquileres": _pesos(ingresos_alquiler),
+        "servicios": _pesos(egresos_servicios),
+    })
+    return orjson.dumps(filas)
+
+async def proyeccion_usuario(db: AsyncSession, usuario_id: int, meses: int) -> bytes:
+    """Proyeccion en JSON, recalculada solo si cambiaron los datos del usuario o el mes."""
+    inicio = date.today().replace(day=1)
+    clave = (await version_datos(db, usuario_id), inicio, meses)
+    cacheado = proyeccion_cache.get((usuario_id, meses))
+    if cacheado is not None and cacheado[0] == clave:
+        return cacheado[1]
+    resultado = await calcular_proyeccion(db, usuario_id, meses, inicio)
+    proyeccion_cache.set((usuario_id, meses), (clave, resultado))
+    return resultado
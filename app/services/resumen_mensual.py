@@ -0,0 +1,102 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, extract, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.models import ResumenMensual, Transaccion
+
+ClaveResumen = Tuple[int, date, int, str]
+
+def primer_dia_del_mes(fecha: date) -> date:
+    return date(fecha.year, fecha.month, 1)
+
+def _insert(dialect_name: str):
+    if dialect_name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+def _clave(transaccion) -> Dict:
+    return {
+        "usuario_id": transaccion.usuario_id,
+        "mes": primer_dia_del_mes(transaccion.fecha),
+        "categoria_id": transaccion.categoria_id,
+        "tipo": getattr(transaccion.tipo, "value", transaccion.tipo),
+    }
+
+async def _upsert(db: AsyncSession, filas: List[Dict]) -> None:
+    insert = _insert(db.get_bind().dialect.name)
+    stmt = insert(ResumenMensual).values(filas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            ResumenMensual.usuario_id,
+            ResumenMensual.mes,
+            ResumenMensual.categoria_id,
+            ResumenMensual.tipo,
+        ],
+        set_={
+            "total": ResumenMensual.total + stmt.excluded.total,
+            "cantidad": ResumenMensual.cantidad + stmt.excluded.cantidad,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+async def aplicar_transaccion(db: AsyncSession, transaccion: Transaccion, signo: int) -> None:
+    """Suma (signo=1) o resta (signo=-1) una transaccion de su fila de resumen.
+
+    Es un unico UPSERT atomico, se ejecuta dentro de la transaccion del
+    handler y se confirma junto con el cambio de la transaccion. Al restar
+    se eliminan las filas que quedan sin transacciones, para no bloquear
+    el borrado de la categoria o del usuario.
+    """
+    clave = _clave(transaccion)
+    await _upsert(db, [{**clave, "total": signo * transaccion.monto, "cantidad": signo}])
+    if signo < 0:
+        await db.execute(
+            delete(ResumenMensual).filter_by(**clave).where(ResumenMensual.cantidad <= 0)
+        )
+
+async def aplicar_lote(db: AsyncSession, transacciones: Iterable) -> None:
+    """Suma un lote de transacciones nuevas con un solo UPSERT multi-fila."""
+    acumulado = defaultdict(lambda: [Decimal(0), 0])
+    for transaccion in transacciones:
+        clave = tuple(_clave(transaccion).items())
+        acumulado[clave][0] += transaccion.monto
+        acumulado[clave][1] += 1
+    if acumulado:
+        await _upsert(db, [
+            {**dict(clave), "total": total, "cantidad": cantidad}
+            for clave, (total, cantidad) in acumulado.items()
+        ])
+
+def calcular_resumen(db: Session) -> Dict[ClaveResumen, Tuple[Decimal, int]]:
+    """Agrega las transacciones crudas con la misma clave que resumen_mensual."""
+    anio = extract("year", Transaccion.fecha)
+    mes = extract("month", Transaccion.fecha)
+    rows = db.execute(
+        select(
+            Transaccion.usuario_id, anio, mes, Transaccion.categoria_id, Transaccion.tipo,
+            func.sum(Transaccion.monto), func.count(),
+        ).group_by(Transaccion.usuario_id, anio, mes, Transaccion.categoria_id, Transaccion.tipo)
+    )
+    return {
+        (usuario_id, date(int(a), int(m), 1), categoria_id, tipo): (total, cantidad)
+        for usuario_id, a, m, categoria_id, tipo, total, cantidad in rows
+    }
+
+def leer_resumen(db: Session) -> Dict[ClaveResumen, Tuple[Decimal, int]]:
+    rows = db.execute(
+        select(
+            ResumenMensual.usuario_id, ResumenMensual.mes, ResumenMensual.categoria_id,
+            ResumenMensual.tipo, ResumenMensual.total, ResumenMensual.cantidad,
+        ).where(ResumenMensual.cantidad != 0)
+    )
+    return {
+        (usuario_id, mes, categoria_id, tipo): (total, cantidad)
+        for usuario_id, mes, categoria_id, tipo, total, cantidad in rows
+    }
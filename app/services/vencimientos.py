@@ -0,0 +1,136 @@
+import hashlib
+import os
+from datetime import date, datetime, timezone
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+from sqlalchemy import func, literal, select, type_coerce, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.models.models import Alquiler, Centavos, OtroCredito, Servicio, TarjetaCredito
+from app.schemas.schemas import Vencimiento
+
+load_dotenv()
+
+# Calendarios iCalendar ya generados, por usuario. Los endpoints que escriben
+# tarjetas, creditos, alquileres o servicios invalidan la entrada del usuario.
+calendario_cache = TTLCache(
+    maxsize=int(os.getenv("CALENDARIO_CACHE_SIZE", 1000)),
+    ttl=float(os.getenv("CALENDARIO_CACHE_TTL", 300)),
+)
+
+# Rangos distintos guardados por usuario
+CALENDARIO_RANGOS_POR_USUARIO = 16
+
+_adapter = TypeAdapter(List[Vencimiento])
+
+def _consulta(usuario_id: int, desde: date, hasta: date, solo_impagos: bool):
+    """Un UNION ALL con una rama por tabla, cada una sobre su indice (usuario_id, vencimiento)."""
+    ramas = []
+    for origen, modelo, descripcion, pagado in (
+        ("tarjeta_credito", TarjetaCredito, TarjetaCredito.detalle, TarjetaCredito.pago),
+        ("otro_credito", OtroCredito, OtroCredito.detalle, OtroCredito.pago),
+        ("alquiler", Alquiler, Alquiler.inquilino, Alquiler.pagado),
+    ):
+        rama = select(
+            literal(origen).label("origen"),
+            modelo.id,
+            modelo.vencimiento,
+            descripcion.label("descripcion"),
+            type_coerce(modelo.deuda - pagado, Centavos).label("monto"),
+            literal(0, Centavos).label("monto_usd"),
+        ).where(modelo.usuario_id == usuario_id, modelo.vencimiento.between(desde, hasta))
+        if solo_impagos:
+            rama = rama.where(modelo.deuda > pagado)
+        ramas.append(rama)
+    ramas.append(
+        select(
+            literal("servicio").label("origen"),
+            Servicio.id,
+            Servicio.vencimiento,
+            Servicio.servicio.label("descripcion"),
+            func.coalesce(Servicio.monto_ars, 0).label("monto"),
+            func.coalesce(Servicio.monto_usd, 0).label("monto_usd"),
+        ).where(Servicio.usuario_id == usuario_id, Servicio.vencimiento.between(desde, hasta))
+    )
+    todas = union_all(*ramas).subquery()
+    return select(todas).order_by(todas.c.vencimiento, todas.c.origen, todas.c.id)
+
+async def listar_vencimientos(
+    db: AsyncSession, usuario_id: int, desde: date, hasta: date, solo_impagos: bool = False
+) -> List[Vencimiento]:
+    rows = await db.execute(_consulta(usuario_id, desde, hasta, solo_impagos))
+    return _adapter.validate_python([row._mapping for row in rows])
+
+def vencimientos_json(vencimientos: List[Vencimiento]) -> bytes:
+    return _adapter.dump_json(vencimientos)
+
+def _escapar(texto: str) -> str:
+    return (
+        texto.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+def _plegar(linea: str) -> str:
+    """Corta las lineas a 75 octetos como pide RFC 5545."""
+    datos = linea.encode()
+    if len(datos) <= 75:
+        return linea
+    partes = []
+    while datos:
+        limite = 75 if not partes else 74
+        corte = min(limite, len(datos))
+        # No partir un caracter UTF-8 a la mitad
+        while corte < len(datos) and (datos[corte] & 0xC0) == 0x80:
+            corte -= 1
+        partes.append(datos[:corte].decode())
+        datos = datos[corte:]
+    return "\r\n ".join(partes)
+
+def generar_ical(vencimientos: List[Vencimiento]) -> bytes:
+    ahora = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    lineas = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//proyecto_1//vencimientos//ES",
+        "CALSCALE:GREGORIAN",
+    ]
+    for v in vencimientos:
+        resumen = v.origen.replace("_", " ").capitalize()
+        if v.descripcion:
+            resumen += f": {v.descripcion}"
+        detalle = f"Monto: {v.monto:.2f}"
+        if v.monto_usd:
+            detalle += f" / USD {v.monto_usd:.2f}"
+        lineas += [
+            "BEGIN:VEVENT",
+            f"UID:{v.origen}-{v.id}@proyecto_1",
+            f"DTSTAMP:{ahora}",
+            f"DTSTART;VALUE=DATE:{v.vencimiento:%Y%m%d}",
+            f"SUMMARY:{_escapar(resumen)}",
+            f"DESCRIPTION:{_escapar(detalle)}",
+            "END:VEVENT",
+        ]
+    lineas.append("END:VCALENDAR")
+    return ("\r\n".join(_plegar(linea) for linea in lineas) + "\r\n").encode()
+
+async def calendario(
+    db: AsyncSession, usuario_id: int, desde: date, hasta: date, solo_impagos: bool = False
+) -> Tuple[str, bytes]:
+    """Devuelve ``(etag, ics)``, generandolo solo si no esta en cache.
+
+    El ETag se calcula sobre los datos y no sobre el archivo, asi no cambia
+    con el DTSTAMP cuando la entrada se regenera sin cambios.
+    """
+    clave = (desde, hasta, solo_impagos)
+    por_rango = calendario_cache.get(usuario_id) or {}
+    if clave in por_rango:
+        return por_rango[clave]
+    vencimientos = await listar_vencimientos(db, usuario_id, desde, hasta, solo_impagos)
+    etag = '"%s"' % hashlib.sha1(vencimientos_json(vencimientos)).hexdigest()
+    if len(por_rango) >= CALENDARIO_RANGOS_POR_USUARIO:
+        por_rango.clear()
+    por_rango[clave] = (etag, generar_ical(vencimientos))
+    calendario_cache.set(usuario_id, por_rango)
+    return por_rango[clave]
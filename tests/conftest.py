@@ -0,0 +1,102 @@
+import os
+import tempfile
+
+# Los modulos de la app leen el entorno al importarse: la configuracion de
+# prueba tiene que estar antes del primer import de ``app``. Las variables
+# vacias no las pisa load_dotenv con lo que haya en un .env local.
+_directorio = tempfile.mkdtemp(prefix="proyecto_1-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_directorio}/test.sqlite"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["REPLICA_DATABASE_URL"] = ""
+os.environ["LIST_CACHE_BACKEND"] = "memory"
+os.environ["DB_POOL_PREWARM"] = "0"
+
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.api.api import api_router
+from app.core.idempotency import respuestas_idempotentes
+from app.core.response_cache import LIST_CACHE_MAX_BYTES, LIST_CACHE_TTL, MemoryBackend, list_cache
+from app.database.database import Base, SessionLocal, async_engine, engine
+from app.main import app
+from app.models.models import Categoria
+from app.services.catalogo_categorias import catalogo_categorias
+from app.services.cotizaciones import indice_cotizaciones
+from app.services.ipc import indice_ipc
+from app.services.proyeccion import proyeccion_cache
+from app.services.vencimientos import calendario_cache
+from tests.utils import API, crear_usuario
+
+if not any(getattr(route, "path", "").startswith(API + "/") for route in app.routes):
+    app.include_router(api_router, prefix=API)
+
+_mediciones: List[str] = []
+
+
+def pytest_terminal_summary(terminalreporter):
+    # Resultados de los tests marcados benchmark (python -m pytest -m benchmark)
+    if _mediciones:
+        terminalreporter.section("benchmarks")
+        for linea in _mediciones:
+            terminalreporter.write_line(linea)
+
+
+def _limpiar_caches() -> None:
+    for cache in (deps.user_cache, deps.escrituras_recientes, respuestas_idempotentes,
+                  proyeccion_cache, calendario_cache):
+        cache.clear()
+    list_cache.backend = MemoryBackend(LIST_CACHE_MAX_BYTES, LIST_CACHE_TTL)
+    indice_cotizaciones._cargado_en = None
+    indice_ipc._cargado_en = None
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """Un solo arranque de la app por sesion: el shutdown cierra pools globales."""
+    Base.metadata.create_all(bind=engine)
+    with TestClient(app) as test_client:
+        yield test_client
+        test_client.portal.call(async_engine.dispose)
+
+
+@pytest.fixture
+def client(app_client):
+    """Cliente sobre una base SQLite vacia y caches limpias."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    _limpiar_caches()
+    app_client.portal.call(catalogo_categorias.recargar)
+    return app_client
+
+
+@pytest.fixture
+def reportar():
+    """Agrega una linea al resumen de benchmarks del final de la corrida."""
+    return _mediciones.append
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def usuario(client, db) -> dict:
+    return crear_usuario(db)
+
+
+@pytest.fixture
+def categoria(client, db, usuario) -> int:
+    categoria = Categoria(nombre="Sueldo", tipo="ingreso")
+    db.add(categoria)
+    db.commit()
+    # El catalogo en memoria se cargo con la tabla vacia
+    client.portal.call(catalogo_categorias.recargar)
+    return categoria.id
@@ -0,0 +1,17 @@
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import TimedAsyncQueuePool
+from app.database.database import opciones_pool
+
+
+def test_sqlite_en_memoria_sin_opciones_de_cola():
+    opciones = opciones_pool("sqlite:///:memory:")
+    assert "max_overflow" not in opciones and "pool_timeout" not in opciones
+    with create_engine("sqlite:///:memory:", **opciones).connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_opciones_de_cola_para_pools_con_cola():
+    opciones = opciones_pool("postgresql+asyncpg://u:p@db/app", TimedAsyncQueuePool)
+    assert opciones["poolclass"] is TimedAsyncQueuePool
+    assert {"pool_size", "max_overflow", "pool_timeout"} <= opciones.keys()
@@ -0,0 +1,55 @@
+import csv
+import io
+import tracemalloc
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app.api.endpoints.transacciones import exportar_filas
+from app.models.models import Transaccion
+from tests.utils import API
+
+FILAS = 5000
+
+
+def cargar(db, usuario, categoria, cantidad):
+    inicio = date(2020, 1, 1)
+    db.execute(insert(Transaccion), [
+        {"fecha": inicio + timedelta(days=i % 1500), "tipo": "egreso", "categoria_id": categoria,
+         "detalle": f"compra {i}", "monto": i + 0.5, "usuario_id": usuario["id"]}
+        for i in range(cantidad)
+    ])
+    db.commit()
+
+
+def test_csv_completo(client, db, usuario, categoria):
+    cargar(db, usuario, categoria, 25)
+    r = client.get(f"{API}/transacciones/export", params={"format": "csv"}, headers=usuario["headers"])
+    assert r.status_code == 200
+    filas = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(filas) == 25
+    assert filas[0]["monto"] == "24.50"
+
+
+def test_memoria_acotada_al_exportar(client, db, usuario, categoria):
+    """El pico de memoria no crece con el total exportado (cursor del lado del servidor)."""
+
+    async def exportar():
+        total = 0
+        tracemalloc.start()
+        try:
+            async for parte in exportar_filas(usuario["id"], None, None, "csv"):
+                total += len(parte)
+            return total, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    cargar(db, usuario, categoria, FILAS)
+    client.portal.call(exportar)  # calienta caches de compilacion de SQLAlchemy
+    total_chico, pico_chico = client.portal.call(exportar)
+    cargar(db, usuario, categoria, 3 * FILAS)
+    total_grande, pico_grande = client.portal.call(exportar)
+
+    assert total_grande > 3 * total_chico
+    # Con todas las filas en memoria el pico creceria en proporcion (4x)
+    assert pico_grande < 1.5 * pico_chico, f"pico {pico_chico} -> {pico_grande} bytes"
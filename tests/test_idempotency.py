@@ -0,0 +1,64 @@
+from app.core.idempotency import respuestas_idempotentes
+from tests.utils import API, CONTRASENA, crear_usuario
+
+
+def cuerpo(usuario, categoria, monto=10):
+    return {"fecha": "2024-06-01", "tipo": "ingreso", "categoria_id": categoria, "monto": monto,
+            "usuario_id": usuario["id"]}
+
+
+def cantidad(client, usuario):
+    return len(client.get(f"{API}/transacciones/", params={"limit": 1000}, headers=usuario["headers"]).json())
+
+
+def test_reintento_repite_la_respuesta_sin_ejecutar(client, usuario, categoria):
+    headers = {**usuario["headers"], "Idempotency-Key": "k-1"}
+    primera = client.post(f"{API}/transacciones/", json=cuerpo(usuario, categoria), headers=headers)
+    segunda = client.post(f"{API}/transacciones/", json=cuerpo(usuario, categoria), headers=headers)
+    assert primera.status_code == segunda.status_code == 200
+    assert segunda.json() == primera.json()
+    assert segunda.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in primera.headers
+    assert cantidad(client, usuario) == 1
+
+
+def test_repite_desde_la_tabla_sin_la_copia_en_memoria(client, usuario, categoria):
+    headers = {**usuario["headers"], "Idempotency-Key": "k-2"}
+    primera = client.post(f"{API}/transacciones/", json=cuerpo(usuario, categoria), headers=headers)
+    respuestas_idempotentes.clear()
+    segunda = client.post(f"{API}/transacciones/", json=cuerpo(usuario, categoria), headers=headers)
+    assert segunda.json() == primera.json()
+    assert segunda.headers["idempotent-replayed"] == "true"
+    assert cantidad(client, usuario) == 1
+
+
+def test_misma_clave_con_otro_cuerpo(client, usuario, categoria):
+    headers = {**usuario["headers"], "Idempotency-Key": "k-3"}
+    client.post(f"{API}/transacciones/", json=cuerpo(usuario, categoria), headers=headers)
+    r = client.post(f"{API}/transacciones/", json=cuerpo(usuario, categoria, monto=11), headers=headers)
+    assert r.status_code == 422
+
+
+def test_claves_separadas_por_usuario(client, db, usuario, categoria):
+    otro = crear_usuario(db, "beto@example.com")
+    client.post(f"{API}/transacciones/", json=cuerpo(usuario, categoria),
+                headers={**usuario["headers"], "Idempotency-Key": "k-4"})
+    r = client.post(f"{API}/transacciones/", json=cuerpo(otro, categoria),
+                    headers={**otro["headers"], "Idempotency-Key": "k-4"})
+    assert r.status_code == 200 and "idempotent-replayed" not in r.headers
+    assert cantidad(client, otro) == 1
+
+
+def test_sin_token_valido_se_rechaza(client, usuario, categoria):
+    r = client.post(f"{API}/usuarios/", json={"nombre": "c", "email": "c@example.com", "contrasena": "x"},
+                    headers={"Idempotency-Key": "k-5"})
+    assert r.status_code == 400
+
+
+def test_login_no_se_guarda(client, usuario):
+    datos = {"username": "ana@example.com", "password": CONTRASENA}
+    for _ in range(2):
+        r = client.post(f"{API}/usuarios/login", data=datos, headers={"Idempotency-Key": "k-6"})
+        assert r.status_code == 200
+        assert "idempotent-replayed" not in r.headers
+    assert len(respuestas_idempotentes) == 0
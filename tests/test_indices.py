@@ -0,0 +1,51 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from app.database.database import async_engine, engine
+from tests.utils import API
+
+
+@contextlib.contextmanager
+def consultas_ejecutadas():
+    """SELECTs (con sus parametros) que la API manda a la base mientras dura el bloque."""
+    capturadas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            capturadas.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capturar)
+    try:
+        yield capturadas
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capturar)
+
+
+def plan(statement, parameters) -> str:
+    conexion = engine.raw_connection()
+    try:
+        filas = conexion.cursor().execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    finally:
+        conexion.close()
+    return "\n".join(fila[-1] for fila in filas)
+
+
+@pytest.mark.parametrize("ruta, tabla, indice", [
+    ("/transacciones/", "transacciones", "ix_transacciones_usuario_fecha_id"),
+    ("/transacciones/?categoria_id={categoria}", "transacciones", "ix_transacciones_usuario_categoria_fecha_id"),
+    ("/tarjetas-credito/", "tarjetas_credito", "ix_tarjetas_credito_usuario_vencimiento"),
+    ("/otros-creditos/", "otros_creditos", "ix_otros_creditos_usuario_vencimiento"),
+    ("/alquileres/", "alquileres", "ix_alquileres_usuario_vencimiento_inquilino"),
+    ("/servicios/", "servicios", "ix_servicios_usuario_vencimiento_servicio"),
+])
+def test_listados_usan_su_indice(client, usuario, categoria, ruta, tabla, indice):
+    with consultas_ejecutadas() as capturadas:
+        r = client.get(API + ruta.format(categoria=categoria), headers=usuario["headers"])
+        assert r.status_code == 200, r.text
+    [(statement, parameters)] = [(s, p) for s, p in capturadas if f"FROM {tabla}" in s]
+    resultado = plan(statement, parameters)
+    assert f"INDEX {indice}" in resultado, resultado
+    # Sin paso de ordenamiento aparte: el indice ya da el orden del listado
+    assert "USE TEMP B-TREE FOR ORDER BY" not in resultado, resultado
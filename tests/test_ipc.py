@@ -0,0 +1,47 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.database.cargar_ipc import cargar_ipc
+from tests.utils import API, crear
+
+AJUSTE = {"ajuste": "ipc", "base": "2024-01"}
+
+
+@pytest.fixture
+def ipc(client, db):
+    # El indice se duplica en febrero: desde ahi un peso vale medio peso de enero
+    cargar_ipc(db, [{"mes": date(2024, 1, 1), "valor": Decimal(100)}, {"mes": date(2024, 2, 1), "valor": Decimal(200)}])
+
+
+def test_dashboard_deflacta_los_totales_del_mes(client, usuario, categoria, ipc):
+    crear(client, usuario, categoria, date.today().isoformat(), 100)
+    totales = client.get(f"{API}/dashboard/", params=AJUSTE, headers=usuario["headers"]).json()["totales"]
+    assert totales["ingresos_mes"] == 100
+    assert totales["coeficiente"] == 0.5 and totales["base"] == "2024-01"
+    assert totales["ingresos_mes_real"] == 50 and totales["neto_mes_real"] == 50
+
+
+def test_proyeccion_deflacta_cada_mes(client, usuario, ipc):
+    vencimiento = date.today().replace(day=1).replace(year=date.today().year + 1)
+    servicio = {"vencimiento": vencimiento.isoformat(), "servicio": "Luz", "monto_ars": 1000, "usuario_id": usuario["id"]}
+    assert client.post(f"{API}/servicios/", json=servicio, headers=usuario["headers"]).status_code == 200
+
+    nominal = client.get(f"{API}/proyeccion/", params={"meses": 24}, headers=usuario["headers"]).json()
+    filas = client.get(f"{API}/proyeccion/", params={"meses": 24, **AJUSTE}, headers=usuario["headers"]).json()
+    assert [fila["egresos"] for fila in filas] == [fila["egresos"] for fila in nominal]
+    assert filas[12]["egresos"] == 1000
+    assert all(fila["coeficiente"] == 0.5 for fila in filas)
+    assert [fila["egresos_real"] for fila in filas] == [fila["egresos"] / 2 for fila in filas]
+
+
+def test_sin_indice_cargado(client, usuario):
+    for ruta in ("/dashboard/", "/proyeccion/"):
+        assert client.get(f"{API}{ruta}", params=AJUSTE, headers=usuario["headers"]).status_code == 404
+
+
+def test_base_fuera_del_indice(client, usuario, ipc):
+    params = {"ajuste": "ipc", "base": "2030-01"}
+    for ruta in ("/dashboard/", "/proyeccion/"):
+        assert client.get(f"{API}{ruta}", params=params, headers=usuario["headers"]).status_code == 404
@@ -0,0 +1,22 @@
+from tests.utils import API, crear
+
+
+def test_cursor_recorre_todo_sin_repetir(client, usuario, categoria):
+    # Varias transacciones el mismo dia: el desempate es por id
+    creadas = [crear(client, usuario, categoria, f"2024-0{1 + i % 3}-15", 10 + i) for i in range(7)]
+    vistos, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        r = client.get(f"{API}/transacciones/", params=params, headers=usuario["headers"])
+        assert r.status_code == 200
+        vistos.extend(t["id"] for t in r.json())
+        cursor = r.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    esperado = sorted(creadas, key=lambda t: (t["fecha"], t["id"]), reverse=True)
+    assert vistos == [t["id"] for t in esperado]
+
+
+def test_cursor_invalido(client, usuario, categoria):
+    r = client.get(f"{API}/transacciones/", params={"cursor": "no-es-un-cursor"}, headers=usuario["headers"])
+    assert r.status_code == 400
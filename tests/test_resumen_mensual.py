@@ -0,0 +1,46 @@
+from datetime import date
+
+from app.models.models import ResumenMensual
+from app.services.resumen_mensual import calcular_resumen
+from tests.utils import API, crear, transaccion
+
+
+def resumen_guardado(db):
+    db.expire_all()
+    return {
+        (fila.usuario_id, fila.mes, fila.categoria_id, fila.tipo): (fila.total, fila.cantidad)
+        for fila in db.query(ResumenMensual).all()
+    }
+
+
+def test_resumen_sigue_a_altas_cambios_y_bajas(client, db, usuario, categoria):
+    a = crear(client, usuario, categoria, "2024-01-10", 100.25)
+    crear(client, usuario, categoria, "2024-01-20", 50)
+    b = crear(client, usuario, categoria, "2024-02-05", 30, tipo="egreso")
+    r = client.post(
+        f"{API}/transacciones/bulk",
+        json=[transaccion(usuario, categoria, "2024-02-10", 5.5), transaccion(usuario, categoria, "2024-03-01", 1)],
+        headers=usuario["headers"],
+    )
+    assert r.json()["insertadas"] == 2
+    # Mover de mes y de monto, y borrar
+    assert client.put(f"{API}/transacciones/{a['id']}", json={"fecha": "2024-03-02", "monto": 7},
+                      headers=usuario["headers"]).status_code == 200
+    assert client.delete(f"{API}/transacciones/{b['id']}", headers=usuario["headers"]).status_code == 200
+
+    assert resumen_guardado(db) == calcular_resumen(db)
+    clave = (usuario["id"], date(2024, 3, 1), categoria, "ingreso")
+    total, cantidad = resumen_guardado(db)[clave]
+    assert (float(total), cantidad) == (8.0, 2)
+    # Los meses que quedan sin transacciones se borran del resumen
+    assert (usuario["id"], date(2024, 2, 1), categoria, "egreso") not in resumen_guardado(db)
+
+
+def test_resumen_endpoint(client, usuario, categoria):
+    crear(client, usuario, categoria, "2024-05-03", 0.1)
+    crear(client, usuario, categoria, "2024-05-04", 0.2)
+    r = client.get(f"{API}/transacciones/resumen", headers=usuario["headers"])
+    assert r.status_code == 200
+    [fila] = r.json()
+    # Montos en centavos enteros: 0.1 + 0.2 suma exacto
+    assert fila["total"] == 0.3 and fila["cantidad"] == 2
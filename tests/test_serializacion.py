@@ -0,0 +1,49 @@
+import json
+import timeit
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.responses import ListSerializer
+from app.schemas import schemas
+from tests.utils import filas_de_ejemplo
+
+# Esquemas que los endpoints devuelven como listas
+ESQUEMAS = [
+    schemas.Usuario, schemas.Categoria, schemas.Transaccion, schemas.ResumenMensual,
+    schemas.ResumenMensualNormalizado, schemas.TarjetaCredito, schemas.OtroCredito,
+    schemas.Alquiler, schemas.ContratoAlquiler, schemas.CarteraPropiedad, schemas.Servicio,
+    schemas.ServicioNormalizado, schemas.CuotaCronograma, schemas.CronogramaMensual,
+    schemas.ProyeccionMensual, schemas.ProyeccionMensualNormalizada, schemas.Vencimiento,
+]
+TAMANOS = [1000, 10000]
+
+parametros = pytest.mark.parametrize("schema", ESQUEMAS, ids=lambda schema: schema.__name__)
+
+
+def camino_fastapi(schema, filas) -> bytes:
+    """Lo que hace FastAPI con response_model: validar, jsonable_encoder y json.dumps."""
+    modelos = TypeAdapter(List[schema]).validate_python(filas, from_attributes=True)
+    return json.dumps(jsonable_encoder(modelos)).encode()
+
+
+@parametros
+def test_mismo_json_que_fastapi(schema):
+    filas = filas_de_ejemplo(schema, TAMANOS[0])
+    assert json.loads(ListSerializer(schema).dump_json(filas)) == json.loads(camino_fastapi(schema, filas))
+
+
+@pytest.mark.benchmark
+@parametros
+@pytest.mark.parametrize("cantidad", TAMANOS)
+def test_benchmark_list_serializer(schema, cantidad, reportar):
+    filas = filas_de_ejemplo(schema, cantidad)
+    serializer = ListSerializer(schema)
+    rapido = min(timeit.repeat(lambda: serializer.dump_json(filas), number=1, repeat=5))
+    comun = min(timeit.repeat(lambda: camino_fastapi(schema, filas), number=1, repeat=5))
+    reportar(
+        f"{schema.__name__:<30} {cantidad:>6} filas: ListSerializer {rapido * 1000:8.1f} ms, "
+        f"FastAPI {comun * 1000:8.1f} ms ({comun / rapido:.1f}x)"
+    )
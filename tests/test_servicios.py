@@ -0,0 +1,31 @@
+from datetime import date
+from decimal import Decimal
+
+from app.database.cargar_cotizaciones import cargar_cotizaciones
+from app.services.cotizaciones import indice_cotizaciones
+from tests.utils import API
+
+
+def cotizar(db, valor):
+    cargar_cotizaciones(db, [{"serie": "oficial", "fecha": date(2024, 1, 1), "valor": Decimal(valor)}])
+    # Vence la copia en memoria, como al pasar COTIZACIONES_CACHE_TTL
+    indice_cotizaciones._cargado_en = None
+
+
+def test_listado_normalizado_sigue_a_las_cotizaciones(client, db, usuario):
+    servicio = {"vencimiento": "2024-03-10", "servicio": "Luz", "monto_ars": 1000, "usuario_id": usuario["id"]}
+    assert client.post(f"{API}/servicios/", json=servicio, headers=usuario["headers"]).status_code == 200
+
+    cotizar(db, 100)
+    r = client.get(f"{API}/servicios/", params={"moneda": "USD"}, headers=usuario["headers"])
+    assert r.json()[0]["monto_total"] == 10.0
+
+    # La pagina anterior quedo en la cache de listados; la recarga de la serie cambia su clave
+    cotizar(db, 200)
+    r = client.get(f"{API}/servicios/", params={"moneda": "USD"}, headers=usuario["headers"])
+    assert r.json()[0]["monto_total"] == 5.0
+
+
+def test_sin_cotizaciones(client, usuario):
+    r = client.get(f"{API}/servicios/", params={"moneda": "USD"}, headers=usuario["headers"])
+    assert r.status_code == 404
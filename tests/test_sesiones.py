@@ -0,0 +1,55 @@
+import fastapi.routing
+from sqlalchemy import select, text
+
+from app.api import deps
+from app.core.responses import ListSerializer
+from app.database.database import RequestSessionLocal, estado_pool, liberar_conexion_request, sesion_request
+from app.models.models import Usuario
+from tests.utils import API, crear
+
+
+def test_listado_se_renderiza_sin_conexion(client, usuario, categoria, monkeypatch):
+    crear(client, usuario, categoria, "2024-01-15", 10)
+    en_uso = []
+    dump_json = ListSerializer.dump_json
+
+    def registrar(self, rows):
+        en_uso.append(estado_pool()["checked_out"])
+        return dump_json(self, rows)
+
+    monkeypatch.setattr(ListSerializer, "dump_json", registrar)
+    r = client.get(f"{API}/transacciones/", headers=usuario["headers"])
+    assert r.status_code == 200 and len(r.json()) == 1
+    assert en_uso == [0]
+
+
+def test_response_model_se_serializa_sin_conexion(client, usuario, monkeypatch):
+    en_uso = []
+    serialize_response = fastapi.routing.serialize_response
+
+    async def registrar(**kwargs):
+        en_uso.append(estado_pool()["checked_out"])
+        return await serialize_response(**kwargs)
+
+    monkeypatch.setattr(fastapi.routing, "serialize_response", registrar)
+    # Sin el usuario en cache, get_current_user lo lee de la base
+    deps.user_cache.clear()
+    r = client.get(f"{API}/usuarios/me", headers=usuario["headers"])
+    assert r.status_code == 200 and r.json()["id"] == usuario["id"]
+    assert en_uso == [0]
+
+
+def test_no_confirma_escrituras_pendientes(client, usuario):
+    async def escribir_sin_commit():
+        async with RequestSessionLocal() as db:
+            sesion_request.set(db)
+            try:
+                await db.execute(text("UPDATE usuarios SET nombre = 'otro'"))
+                await liberar_conexion_request()
+                assert db.in_transaction()
+            finally:
+                sesion_request.set(None)
+        async with RequestSessionLocal() as db:
+            return await db.scalar(select(Usuario.nombre))
+
+    assert client.portal.call(escribir_sin_commit) == "ana"
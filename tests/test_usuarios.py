@@ -0,0 +1,88 @@
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.api import deps
+from app.api.endpoints import usuarios
+from app.core.cache import TTLCache
+from app.core.password_pool import password_pool
+from app.database.database import async_engine, estado_pool
+from tests.utils import API, CONTRASENA
+
+REPETICIONES = 200
+
+
+def contar_sentencias():
+    contador = {"sentencias": 0}
+
+    def contar(*_):
+        contador["sentencias"] += 1
+
+    return contador, contar
+
+
+def test_me_resuelve_el_usuario_sin_ir_a_la_base(client, usuario):
+    contador, contar = contar_sentencias()
+    assert client.get(f"{API}/usuarios/me", headers=usuario["headers"]).status_code == 200
+    event.listen(async_engine.sync_engine, "before_cursor_execute", contar)
+    try:
+        for _ in range(REPETICIONES):
+            r = client.get(f"{API}/usuarios/me", headers=usuario["headers"])
+            assert r.status_code == 200
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", contar)
+    assert contador["sentencias"] == 0
+    assert r.json()["email"] == "ana@example.com"
+
+
+def requests_por_segundo(client, headers, cantidad: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(cantidad):
+        assert client.get(f"{API}/usuarios/me", headers=headers).status_code == 200
+    return cantidad / (time.perf_counter() - inicio)
+
+
+@pytest.mark.benchmark
+def test_benchmark_me_con_y_sin_cache(client, usuario, monkeypatch, reportar):
+    cantidad = 1000
+    requests_por_segundo(client, usuario["headers"], 50)  # calentamiento
+    con_cache = requests_por_segundo(client, usuario["headers"], cantidad)
+    # Sin cache cada request vuelve a leer el usuario de la base, como antes
+    monkeypatch.setattr(deps, "user_cache", TTLCache(maxsize=0))
+    sin_cache = requests_por_segundo(client, usuario["headers"], cantidad)
+    reportar(
+        f"/usuarios/me {cantidad} requests: sin cache {sin_cache:.0f} req/s, "
+        f"con cache {con_cache:.0f} req/s ({con_cache / sin_cache:.2f}x)"
+    )
+
+
+def test_me_despues_de_invalidar_el_cache(client, usuario):
+    assert client.get(f"{API}/usuarios/me", headers=usuario["headers"]).status_code == 200
+    deps.user_cache.clear()
+    assert client.get(f"{API}/usuarios/me", headers=usuario["headers"]).json()["id"] == usuario["id"]
+
+
+def test_token_invalido(client):
+    r = client.get(f"{API}/usuarios/me", headers={"Authorization": "Bearer no-es-un-jwt"})
+    assert r.status_code == 401
+
+
+def test_email_repetido_no_ocupa_el_pool_de_hashing(client, usuario):
+    completadas = password_pool.stats()["completed"]
+    r = client.post(f"{API}/usuarios/", json={"nombre": "x", "email": "ana@example.com", "contrasena": "x"})
+    assert r.status_code == 400
+    assert password_pool.stats()["completed"] == completadas
+
+
+def test_login_verifica_la_contrasena_sin_retener_una_conexion(client, usuario, monkeypatch):
+    en_uso = []
+
+    def verificar(contrasena, hash_guardado):
+        en_uso.append(estado_pool()["checked_out"])
+        return usuarios.pwd_context.verify(contrasena, hash_guardado)
+
+    monkeypatch.setattr(usuarios, "verify_password", verificar)
+    r = client.post(f"{API}/usuarios/login", data={"username": "ana@example.com", "password": CONTRASENA})
+    assert r.status_code == 200
+    assert en_uso == [0]
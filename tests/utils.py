@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Annotated, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, EmailStr
+from pydantic.fields import FieldInfo
+from pydantic_core import PydanticUndefined
+
+from app.api.endpoints.usuarios import get_password_hash
+from app.core.security import create_access_token
+from app.models.models import Usuario
+
+API = "/api"
+CONTRASENA = "secreta"
+
+
+@lru_cache
+def _hash() -> str:
+    # bcrypt es lento a proposito: un solo hash para todos los usuarios de prueba
+    return get_password_hash(CONTRASENA)
+
+
+def crear_usuario(db, email: str = "ana@example.com", rol: str = "usuario") -> dict:
+    """Crea el usuario en la base y devuelve los headers con su token."""
+    usuario = Usuario(nombre=email.split("@")[0], email=email, contrasena=_hash(), rol=rol)
+    db.add(usuario)
+    db.commit()
+    token = create_access_token({"sub": str(usuario.id), "email": usuario.email, "rol": usuario.rol})
+    return {"id": usuario.id, "headers": {"Authorization": f"Bearer {token}"}}
+
+
+def transaccion(usuario, categoria, fecha, monto, tipo="ingreso"):
+    return {
+        "fecha": fecha, "tipo": tipo, "categoria_id": categoria,
+        "monto": monto, "usuario_id": usuario["id"],
+    }
+
+
+def crear(client, usuario, categoria, fecha, monto, tipo="ingreso"):
+    r = client.post(
+        f"{API}/transacciones/", json=transaccion(usuario, categoria, fecha, monto, tipo),
+        headers=usuario["headers"],
+    )
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _valor_de_ejemplo(campo: str, info: FieldInfo, i: int):
+    # Los valores por defecto ya cumplen las restricciones del campo (por ejemplo un pattern)
+    if info.default not in (None, PydanticUndefined):
+        return info.default
+    anotacion = info.annotation
+    if get_origin(anotacion) is Union:
+        anotacion = next(tipo for tipo in get_args(anotacion) if tipo is not type(None))
+    if get_origin(anotacion) is Annotated:
+        anotacion = get_args(anotacion)[0]
+    if isinstance(anotacion, type) and issubclass(anotacion, Enum):
+        opciones = list(anotacion)
+        return opciones[i % len(opciones)]
+    if anotacion is EmailStr:
+        return f"usuario{i}@example.com"
+    if anotacion is datetime:
+        return datetime(2024, 1, 1, 12) + timedelta(minutes=i)
+    if anotacion is date:
+        return date(2024, 1, 1) + timedelta(days=i % 900)
+    if anotacion is Decimal:
+        return Decimal(i + 1) / 4
+    if anotacion is float:
+        return i / 3
+    if anotacion is int:
+        return i % 100 + 1
+    if anotacion is str:
+        return f"{campo} {i}"
+    raise TypeError(f"Sin valor de ejemplo para {campo}: {anotacion!r}")
+
+
+def filas_de_ejemplo(schema: Type[BaseModel], cantidad: int) -> list:
+    """Filas con los atributos de ``schema``, como las devolveria el ORM."""
+    campos = schema.model_fields.items()
+    return [
+        SimpleNamespace(**{campo: _valor_de_ejemplo(campo, info, i) for campo, info in campos})
+        for i in range(cantidad)
+    ]